@@ -0,0 +1,66 @@
+import os, json, time, logging, threading
+from typing import Dict
+
+TARGET_DIMENSIONS = ("collection", "tile", "notebook", "endpoint", "target")
+OTHER = "other"
+
+log = logging.getLogger(__name__)
+
+
+class CardinalityGuard:
+    """Caps the number of distinct values per target dimension, across runs.
+
+    The first `limit` values seen for a dimension are kept, any further
+    value is reported as "other". Known values are persisted with the time
+    they were last seen in `path`; values unseen for `ttl_days` free their
+    slot again.
+    """
+    def __init__(self, path: str, limit: int = 100, ttl_days: float = 30):
+        self.path = path
+        self.limit = limit
+        self.ttl = ttl_days * 86400
+        self._lock = threading.Lock()
+        self._values = self._load()
+        self._dirty = False
+        self._rolled_up = set()
+
+    def _load(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                values = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning("label values %s unreadable, starting empty: %s", self.path, e)
+            return {}
+        cutoff = time.time() - self.ttl
+        return {dim: {value: seen for value, seen in seen_by_value.items() if seen >= cutoff}
+                for dim, seen_by_value in values.items()}
+
+    def value(self, dim: str, value) -> str:
+        value = str(value)
+        with self._lock:
+            seen = self._values.setdefault(dim, {})
+            if value not in seen and len(seen) >= self.limit:
+                if (dim, value) not in self._rolled_up:
+                    self._rolled_up.add((dim, value))
+                    log.warning("label %s=%s exceeds %d distinct values, reported as %s", dim, value, self.limit, OTHER)
+                return OTHER
+            seen[value] = time.time()
+            self._dirty = True
+            return value
+
+    def apply(self, attrs: Dict[str, str]) -> Dict[str, str]:
+        """attrs with the values of all target dimensions passed through the guard."""
+        return {key: self.value(key, value) if key in TARGET_DIMENSIONS else value for key, value in attrs.items()}
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._values, f, indent=2, sort_keys=True)
+            os.replace(tmp, self.path)
+            self._dirty = False
@@ -0,0 +1,235 @@
+import socket, threading, time, logging
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+from urllib3.util.retry import Retry
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from e2e_helpers import trace
+
+POOL_SIZE = 64
+RETRIES = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504), raise_on_status=False)
+PHASES = ("dns", "connect", "tls", "ttfb", "transfer")
+
+log = logging.getLogger(__name__)
+_local = threading.local()
+_lock = threading.Lock()
+_session = None
+_counters = {"http_requests": 0, "http_bytes_sent": 0, "http_bytes_received": 0}
+_counters_lock = threading.Lock()
+_aiohttp_trace_config = None
+
+
+def _header_size(headers) -> int:
+    return sum(len(key) + len(value) + 4 for key, value in headers.items())
+
+
+def _count(r):
+    """Add a response (and the redirects that led to it) to the process-wide traffic counters.
+
+    Sizes are HTTP/1.1 wire estimates: start line, headers and the body as
+    transferred. For stream=True the body is counted by its Content-Length.
+    """
+    sent = received = 0
+    for response in (*r.history, r):
+        request = response.request
+        body = len(request.body) if isinstance(request.body, (bytes, str)) else 0
+        sent += len(f"{request.method} {request.path_url} HTTP/1.1\r\n") + _header_size(request.headers) + body
+        received += len(f"HTTP/1.1 {response.status_code} {response.reason}\r\n") + _header_size(response.headers)
+        received += response.raw.tell() if response._content_consumed else int(response.headers.get("Content-Length", 0))
+    _add(1 + len(r.history), sent, received)
+
+
+def _add(requests: int, sent: int, received: int):
+    with _counters_lock:
+        _counters["http_requests"] += requests
+        _counters["http_bytes_sent"] += sent
+        _counters["http_bytes_received"] += received
+
+
+def aiohttp_trace_config():
+    """Process-wide aiohttp TraceConfig that adds requests and bytes to stats().
+
+    For aiohttp clients such as the fsspec HTTP store behind zarr, e.g.
+    storage_options={"client_kwargs": {"trace_configs": [aiohttp_trace_config()]}}.
+    Sizes are the same wire estimates as for TimedSession, bodies as read.
+    """
+    global _aiohttp_trace_config
+    import aiohttp
+
+    async def on_request_end(session, context, params):
+        response = params.response
+        _add(1, len(f"{params.method} {params.url.raw_path_qs} HTTP/1.1\r\n") + _header_size(params.headers),
+             len(f"HTTP/1.1 {response.status} {response.reason}\r\n") + _header_size(response.headers))
+
+    async def on_request_exception(session, context, params):
+        _add(1, 0, 0)
+
+    async def on_request_chunk_sent(session, context, params):
+        _add(0, len(params.chunk), 0)
+
+    async def on_response_chunk_received(session, context, params):
+        _add(0, 0, len(params.chunk))
+
+    with _lock:
+        if _aiohttp_trace_config is None:
+            config = aiohttp.TraceConfig()
+            config.on_request_end.append(on_request_end)
+            config.on_request_redirect.append(on_request_end)
+            config.on_request_exception.append(on_request_exception)
+            config.on_request_chunk_sent.append(on_request_chunk_sent)
+            config.on_response_chunk_received.append(on_response_chunk_received)
+            _aiohttp_trace_config = config
+        return _aiohttp_trace_config
+
+
+def stats() -> dict:
+    """Requests and bytes sent/received since the process started.
+
+    Covers TimedSession and aiohttp clients set up with
+    aiohttp_trace_config() only; the openeo client, openstacksdk and
+    websockets keep their own connections and are not counted.
+    """
+    with _counters_lock:
+        return dict(_counters)
+
+
+def _phases() -> dict:
+    if not hasattr(_local, "phases"):
+        _local.phases = dict.fromkeys(PHASES, 0.0)
+    return _local.phases
+
+
+class _TimedConnectionMixin:
+    def _new_conn(self):
+        # resolve separately so DNS and TCP connect can be told apart, then try every
+        # address in order like urllib3's create_connection (e.g. IPv4 after a broken IPv6 route)
+        host = self._dns_host
+        t = time.perf_counter()
+        try:
+            addresses = [info[4][0] for info in socket.getaddrinfo(host.strip("[]"), self.port, allowed_gai_family(),
+                                                                    socket.SOCK_STREAM)]
+        except socket.gaierror:
+            return super()._new_conn()
+        dns = time.perf_counter() - t
+        error = None
+        try:
+            for ip in addresses:
+                self._dns_host = ip
+                try:
+                    sock = super()._new_conn()
+                    break
+                except (NewConnectionError, ConnectTimeoutError) as e:
+                    error = e
+            else:
+                raise error
+        finally:
+            self._dns_host = host
+        phases = _phases()
+        phases["dns"] += dns
+        phases["connect"] += time.perf_counter() - t - dns
+        return sock
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        phases = _phases()
+        before = phases["dns"] + phases["connect"]
+        t = time.perf_counter()
+        super().connect()
+        phases["tls"] += time.perf_counter() - t - (phases["dns"] + phases["connect"] - before)
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+
+
+class TimedSession(requests.Session):
+    """Keep-alive session with retry/backoff that attaches a phase breakdown to every response.
+
+    response.timings holds dns, connect, tls, ttfb, transfer and total in
+    seconds. dns/connect/tls are 0 when a pooled connection was reused; with
+    stream=True the transfer happens after the call and is not included.
+    While a probe is traced, every request is a client span with URL, status,
+    body sizes and the phase breakdown. All traffic is added to stats().
+    """
+    def __init__(self, pool_size: int = POOL_SIZE, retries: Retry = RETRIES):
+        super().__init__()
+        adapter = TimedAdapter(pool_connections=16, pool_maxsize=pool_size, pool_block=True, max_retries=retries)
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+
+    def request(self, method, url, *args, **kwargs):
+        with trace.span(f"{method.upper()} {urlsplit(url).hostname}", {"http.request.method": method.upper(), "url.full": url},
+                        kind=SpanKind.CLIENT) as span:
+            r = self._timed_request(method, url, *args, **kwargs)
+            if span is not None:
+                size = r.headers.get("Content-Length") if kwargs.get("stream") else len(r.content)
+                span.set_attribute("http.response.status_code", r.status_code)
+                if size is not None:
+                    span.set_attribute("http.response.body.size", int(size))
+                if r.request.body is not None:
+                    span.set_attribute("http.request.body.size", len(r.request.body))
+                for phase, value in r.timings.items():
+                    span.set_attribute(f"http.timing.{phase}", value)
+                if r.status_code >= 400:
+                    span.set_status(Status(StatusCode.ERROR, f"HTTP {r.status_code}"))
+        return r
+
+    def _timed_request(self, method, url, *args, **kwargs):
+        _local.phases = dict.fromkeys(PHASES, 0.0)
+        t = time.perf_counter()
+        r = super().request(method, url, *args, **kwargs)
+        total = time.perf_counter() - t
+        _count(r)
+        phases = _local.phases
+        headers = r.elapsed.total_seconds()
+        phases["ttfb"] = max(0.0, headers - phases["dns"] - phases["connect"] - phases["tls"])
+        phases["transfer"] = max(0.0, total - headers)
+        phases["total"] = total
+        r.timings = phases
+        log.debug("%s %s %s %s", method, url, r.status_code,
+                  " ".join(f"{phase}={value * 1000:.1f}ms" for phase, value in phases.items()))
+        return r
+
+
+def session() -> TimedSession:
+    """Process-wide session shared by all probes and threads."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = TimedSession()
+        return _session
+
+
+def get(url, **kwargs):
+    return session().get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    return session().post(url, **kwargs)
+
+
+def head(url, **kwargs):
+    return session().head(url, **kwargs)
+
+
+def delete(url, **kwargs):
+    return session().delete(url, **kwargs)
@@ -0,0 +1,48 @@
+import os
+
+BLOCK_SIZE = 64 * 1024
+HEAD_BYTES = 64
+
+
+def tail_lines(path: str, n: int, block_size: int = BLOCK_SIZE) -> list:
+    """The last `n` lines of a text file, read backwards from its end in blocks.
+
+    Costs O(n) line lengths, independent of the file size.
+    """
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b""
+        # one newline more than needed, so the first kept line is complete
+        while pos > 0 and data.count(b"\n") <= n:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    lines = data.decode("utf-8", errors="replace").splitlines()
+    return lines[-n:] if n else []
+
+
+def read_new_lines(path: str, cursor: dict) -> list:
+    """Complete lines appended to `path` since `cursor`, which is updated in place.
+
+    `cursor` holds the byte offset, inode and first bytes of the file at the
+    last read (empty for a first read). A truncated or replaced file is read
+    from the start and cursor["reset"] is set, so callers can drop state they
+    built from the old content. A trailing line without newline is left for
+    the next read.
+    """
+    st = os.stat(path)
+    offset = cursor.get("offset", 0)
+    with open(path, "rb") as f:
+        # inodes are reused, the first bytes tell a recreated file apart
+        head = f.read(HEAD_BYTES).hex()
+        cursor["reset"] = (cursor.get("inode") != st.st_ino or st.st_size < offset
+                           or not head.startswith(cursor.get("head", "")))
+        if cursor["reset"]:
+            offset = 0
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    cursor.update(offset=offset + end, inode=st.st_ino, head=head)
+    return data[:end].decode("utf-8", errors="replace").splitlines()
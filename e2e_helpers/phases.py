@@ -0,0 +1,73 @@
+import time, logging, threading
+from contextlib import ContextDecorator
+from typing import NamedTuple, Dict
+from e2e_helpers import trace
+
+log = logging.getLogger(__name__)
+_local = threading.local()
+_lock = threading.Lock()
+_records = []
+
+
+class PhaseRecord(NamedTuple):
+    phase: str
+    seconds: float
+    ok: bool
+    attrs: Dict[str, str]
+
+
+def _stack() -> list:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+class phase(ContextDecorator):
+    """Time a named part of a probe, as `with phase("kernel_start"):` or `@phase("kernel_start")`.
+
+    Phases nest per thread: a phase opened inside another one is recorded
+    as "outer/inner" and inherits its attributes. Every finished phase is
+    kept until drain(), which MetricsSession.flush() calls to export them
+    as the eodc_e2e_phase_duration_seconds histogram. While a probe is
+    traced, each phase is also a span.
+    """
+    def __init__(self, name: str, **attrs: str):
+        self.name = name
+        self.attrs = {key: str(value) for key, value in attrs.items()}
+
+    def _recreate_cm(self):
+        # a fresh instance per decorated call, so recursive and threaded calls do not share state
+        return phase(self.name, **self.attrs)
+
+    def __enter__(self):
+        stack = _stack()
+        parent = stack[-1] if stack else None
+        self.path = f"{parent.path}/{self.name}" if parent else self.name
+        self.attrs = {**(parent.attrs if parent else {}), **self.attrs}
+        stack.append(self)
+        self._span = trace.span(self.name, self.attrs)
+        self._span.__enter__()
+        self._t = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._t
+        self._span.__exit__(exc_type, exc, tb)
+        _stack().pop()
+        record = PhaseRecord(self.path, seconds, exc_type is None, self.attrs)
+        with _lock:
+            _records.append(record)
+        log.debug("phase %s %.3fs%s", self.path, seconds, "" if record.ok else " (failed)")
+        return False
+
+
+def drain() -> list:
+    """Return and forget all phases finished so far, in the order they ended."""
+    global _records
+    with _lock:
+        records, _records = _records, []
+    return records
+
+
+def pending() -> bool:
+    return bool(_records)
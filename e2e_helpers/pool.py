@@ -0,0 +1,62 @@
+import queue, threading
+from concurrent.futures import Future
+from typing import Callable, Iterable
+
+
+class DaemonPool:
+    """Thread pool whose workers are daemon threads.
+
+    concurrent.futures joins its worker threads at interpreter exit, so a
+    hung task keeps the process alive even after its future was given up.
+    Tasks on this pool do not: once shutdown() was called, the process can
+    exit while a task is still running. submit() returns a regular Future,
+    usable with concurrent.futures.wait().
+    """
+    def __init__(self, max_workers: int):
+        self._queue = queue.Queue()
+        self._workers = [threading.Thread(target=self._work, daemon=True) for _ in range(max_workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, fn, args = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def submit(self, fn: Callable, *args) -> Future:
+        future = Future()
+        self._queue.put((future, fn, args))
+        return future
+
+    def map(self, fn: Callable, items: Iterable) -> list:
+        """fn(item) for all items, in order; waits for all of them and raises the first exception."""
+        futures = [self.submit(fn, item) for item in items]
+        return [future.result() for future in futures]
+
+    def shutdown(self, cancel_futures: bool = False):
+        """Stop the workers after their current task, without waiting for them."""
+        if cancel_futures:
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item[0].cancel()
+        for _ in self._workers:
+            self._queue.put(None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        return False
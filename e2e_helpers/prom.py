@@ -1,38 +1,259 @@
-import os, time, logging
+import os, time, atexit, logging, threading
+from typing import Dict, Iterable, Optional, Tuple
 from opentelemetry.sdk.metrics import MeterProvider
-from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+from opentelemetry.sdk.metrics.export import MetricExportResult, MetricReader
+from opentelemetry.sdk.metrics.view import ExplicitBucketHistogramAggregation, View
 from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExporter
-from opentelemetry.sdk.resources import Resource
+from opentelemetry.exporter.otlp.proto.common.metrics_encoder import encode_metrics
+from e2e_helpers import http_client, phases, trace, usage
+from e2e_helpers.cardinality import CardinalityGuard, TARGET_DIMENSIONS
+from e2e_helpers.spool import Spool
 
 OTEL_ENDPOINT = os.environ.get("OTEL_ENDPOINT", "https://otel.infra.eodc.eu/v1/metrics")
 OTEL_API_KEY  = os.environ.get("OTEL_API_KEY")
+OTEL_SPOOL    = os.environ.get("OTEL_SPOOL", "results/otel_spool.bin")
+OTEL_SPOOL_MAX_BYTES = int(os.environ.get("OTEL_SPOOL_MAX_BYTES", str(1 << 20)))
+OTEL_LABEL_VALUES = os.environ.get("OTEL_LABEL_VALUES", "results/label_values.json")
+OTEL_MAX_LABEL_VALUES = int(os.environ.get("OTEL_MAX_LABEL_VALUES", "100"))
+PHASE_METRIC  = "eodc_e2e_phase_duration_seconds"
+PHASE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
 
 log = logging.getLogger(__name__)
+_sessions = {}
+_sessions_lock = threading.Lock()
+_guard = None
+_guard_lock = threading.Lock()
 
 
-def push_e2e_result(service: str, success: bool, duration_s: float, *, team: str = "access", datacenter: str = "vienna"):
-    env = os.environ.get("E2E_ENV", "dev")
-    resource = Resource(attributes={
-        "environment":  env,
-        "service.name": service,
-        "datacenter":   datacenter,
-        "team":         team,
-    })
-    headers  = {"Authorization": f"Bearer {OTEL_API_KEY}"} if OTEL_API_KEY else {}
-    exporter = OTLPMetricExporter(endpoint=OTEL_ENDPOINT, headers=headers)
-    reader   = PeriodicExportingMetricReader(exporter, export_interval_millis=3_600_000)
-    provider = MeterProvider(metric_readers=[reader], resource=resource)
-    meter    = provider.get_meter("eodc.e2e")
-
-    attrs = {}
-    meter.create_gauge("eodc_e2e_last_result").set(1.0 if success else 0.0, attrs)
-    meter.create_gauge("eodc_e2e_test_duration_seconds").set(float(duration_s), attrs)
-    if success:
-        meter.create_gauge("eodc_e2e_last_success_timestamp").set(time.time(), attrs)
-
-    ok = provider.force_flush(timeout_millis=10_000)
-    provider.shutdown()
-    if ok:
-        log.info("otel metrics flushed  service=%s  success=%s  duration=%.2fs", service, success, duration_s)
-    else:
-        log.error("otel export FAILED — metrics not delivered to %s", OTEL_ENDPOINT)
+def label_guard() -> CardinalityGuard:
+    """Process-wide guard for the values of target dimensions (see e2e_helpers.cardinality)."""
+    global _guard
+    with _guard_lock:
+        if _guard is None:
+            _guard = CardinalityGuard(OTEL_LABEL_VALUES, OTEL_MAX_LABEL_VALUES)
+        return _guard
+
+
+class SpoolingMetricExporter(OTLPMetricExporter):
+    """OTLP/HTTP exporter that keeps undelivered exports in a local spool.
+
+    Each export sends the spooled requests together with the new data in a
+    single OTLP request; spooled data points keep their original timestamps.
+    If delivery fails, for a network error, 5xx, 408, 429 or an auth error
+    (401/403, e.g. an expired OTEL_API_KEY), the new request is appended to
+    the spool. If the receiver rejects the combined request with another
+    4xx, including 413 for a replay too large as a whole, the requests are
+    sent one by one: only those rejected on their own are dropped.
+    """
+    # statuses after which a request is kept for a later export
+    RETRY_STATUSES = (401, 403, 408, 429)
+
+    def __init__(self, endpoint: str, headers: Dict[str, str], spool: Spool):
+        super().__init__(endpoint=endpoint, headers=headers)
+        self.endpoint = endpoint
+        self.headers = {**headers, "Content-Type": "application/x-protobuf"}
+        self.spool = spool
+
+    def _post(self, body: bytes, timeout_millis: float) -> str:
+        """Send one OTLP request; returns "sent", "keep" (retry later) or "drop" (rejected)."""
+        try:
+            with trace.untraced():
+                r = http_client.post(self.endpoint, data=body, headers=self.headers, timeout=timeout_millis / 1000)
+        except Exception as e:
+            log.error("otel export to %s failed: %s", self.endpoint, e)
+            return "keep"
+        if 200 <= r.status_code < 300:
+            return "sent"
+        if 400 <= r.status_code < 500 and r.status_code not in self.RETRY_STATUSES:
+            log.error("otel export rejected with HTTP %s (%d bytes)", r.status_code, len(body))
+            return "drop"
+        log.error("otel export failed with HTTP %s", r.status_code)
+        return "keep"
+
+    def export(self, metrics_data, timeout_millis: float = 10_000, **kwargs) -> MetricExportResult:
+        request = encode_metrics(metrics_data).SerializeToString()
+        pending = self.spool.read()
+        # concatenated protobuf messages merge into one request with all resource_metrics
+        outcome = self._post(b"".join(pending) + request, timeout_millis)
+        if outcome == "sent":
+            if pending:
+                self.spool.clear()
+                log.info("otel spool replayed  requests=%d", len(pending))
+            return MetricExportResult.SUCCESS
+        if outcome == "keep" or not pending:
+            if outcome == "keep":
+                self.spool.append(request)
+                log.error("otel export spooled to %s", self.spool.path)
+            return MetricExportResult.FAILURE
+        # a single bad record must not take the others with it
+        records, kept, delivered = pending + [request], [], False
+        for i, record in enumerate(records):
+            outcome = self._post(record, timeout_millis)
+            if outcome == "keep":
+                kept += records[i:]
+                break
+            delivered = delivered or (outcome == "sent" and i == len(pending))
+        self.spool.replace(kept)
+        log.info("otel spool replayed one by one  requests=%d kept=%d", len(records), len(kept))
+        return MetricExportResult.SUCCESS if delivered else MetricExportResult.FAILURE
+
+    def shutdown(self, timeout_millis: float = 30_000, **kwargs):
+        pass
+
+
+class BatchMetricReader(MetricReader):
+    """Reader that exports only on an explicit flush, never periodically or on shutdown."""
+    def __init__(self, exporter):
+        super().__init__(preferred_temporality=exporter._preferred_temporality,
+                         preferred_aggregation=exporter._preferred_aggregation)
+        self._exporter = exporter
+        self.last_result = None
+
+    def _receive_metrics(self, metrics_data, timeout_millis: float = 10_000, **kwargs):
+        if metrics_data is not None:
+            self.last_result = self._exporter.export(metrics_data, timeout_millis=timeout_millis)
+
+    def force_flush(self, timeout_millis: float = 10_000) -> bool:
+        self.last_result = None
+        self.collect(timeout_millis=timeout_millis)
+        return self.last_result in (None, MetricExportResult.SUCCESS)
+
+    def shutdown(self, timeout_millis: float = 30_000, **kwargs):
+        self._exporter.shutdown(timeout_millis=timeout_millis)
+
+
+class MetricsSession:
+    """Long-lived OTel metrics pipeline for one service.
+
+    The exporter, reader and provider are built once. Any number of results,
+    gauges and histogram observations can be recorded and are delivered
+    together in one batched export by flush(), which also picks up the
+    timings of all finished phases (see e2e_helpers.phases); close() flushes
+    and shuts the pipeline down. Values of target dimensions (collection,
+    tile, notebook, endpoint, target) pass through label_guard(), beyond
+    its cap they are recorded as "other".
+    """
+    def __init__(self, service: str, *, team: str = "access", datacenter: str = "vienna"):
+        resource = trace.service_resource(service, team, datacenter)
+        headers  = {"Authorization": f"Bearer {OTEL_API_KEY}"} if OTEL_API_KEY else {}
+        exporter = SpoolingMetricExporter(OTEL_ENDPOINT, headers, Spool(OTEL_SPOOL, OTEL_SPOOL_MAX_BYTES))
+        self.service  = service
+        self.reader   = BatchMetricReader(exporter)
+        self.provider = MeterProvider(metric_readers=[self.reader], resource=resource, shutdown_on_exit=False,
+                                      views=[View(instrument_name=PHASE_METRIC,
+                                                  aggregation=ExplicitBucketHistogramAggregation(PHASE_BUCKETS))])
+        self.meter    = self.provider.get_meter("eodc.e2e")
+        self._gauges  = {}
+        self._histograms = {}
+        self._lock    = threading.Lock()
+        self._closed  = False
+        self._dirty   = False
+
+    def gauge(self, name: str, value: float, attrs: Optional[Dict[str, str]] = None):
+        with self._lock:
+            if name not in self._gauges:
+                self._gauges[name] = self.meter.create_gauge(name)
+            instrument = self._gauges[name]
+        instrument.set(float(value), label_guard().apply(attrs or {}))
+        self._dirty = True
+
+    def histogram(self, name: str, value: float, attrs: Optional[Dict[str, str]] = None, unit: str = "s"):
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = self.meter.create_histogram(name, unit=unit)
+            instrument = self._histograms[name]
+        instrument.record(float(value), label_guard().apply(attrs or {}))
+        self._dirty = True
+
+    def record_usage(self):
+        """Record the resource usage of this run (see e2e_helpers.usage) as eodc_e2e_<name> gauges."""
+        snapshot = usage.snapshot()
+        for name, value in snapshot.items():
+            self.gauge(f"eodc_e2e_{name}", value)
+        log.info("resource usage  service=%s  %s", self.service,
+                 "  ".join(f"{name}={value:.2f}" if isinstance(value, float) else f"{name}={value}"
+                           for name, value in snapshot.items()))
+
+    def record_phases(self):
+        """Move the timings of all finished phases into the phase duration histogram."""
+        for record in phases.drain():
+            self.histogram(PHASE_METRIC, record.seconds,
+                           {**record.attrs, "phase": record.phase, "status": "ok" if record.ok else "error"})
+
+    def record_result(self, success: bool, duration_s: float, attrs: Optional[Dict[str, str]] = None,
+                      targets: Optional[Dict[str, bool]] = None):
+        """Record the standard result gauges, optionally with per-target results."""
+        self.gauge("eodc_e2e_last_result", 1.0 if success else 0.0, attrs)
+        self.gauge("eodc_e2e_test_duration_seconds", duration_s, attrs)
+        if success:
+            self.gauge("eodc_e2e_last_success_timestamp", time.time(), attrs)
+        for target, target_ok in (targets or {}).items():
+            self.gauge("eodc_e2e_target_result", 1.0 if target_ok else 0.0, {**(attrs or {}), "target": target})
+
+    def flush(self, timeout_millis: int = 10_000) -> bool:
+        """Export everything recorded so far in one request."""
+        self.record_phases()
+        label_guard().save()
+        ok = self.reader.force_flush(timeout_millis=timeout_millis)
+        self._dirty = False
+        if not ok:
+            log.error("otel export FAILED — metrics not delivered to %s", OTEL_ENDPOINT)
+        return ok
+
+    def close(self) -> bool:
+        if self._closed:
+            return True
+        ok = self.flush() if self._dirty or phases.pending() else True
+        self.provider.shutdown()
+        self._closed = True
+        return ok
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def get_session(service: str, *, team: str = "access", datacenter: str = "vienna") -> MetricsSession:
+    """Process-wide MetricsSession per service, closed at interpreter exit."""
+    key = (service, team, datacenter)
+    with _sessions_lock:
+        if key not in _sessions:
+            _sessions[key] = MetricsSession(service, team=team, datacenter=datacenter)
+        return _sessions[key]
+
+
+@atexit.register
+def _close_sessions():
+    for session in list(_sessions.values()):
+        session.close()
+
+
+def push_e2e_result(service: str, success: bool, duration_s: float, *, team: str = "access", datacenter: str = "vienna",
+                    targets: Optional[Dict[str, bool]] = None,
+                    gauges: Optional[Iterable[Tuple[str, float, Dict[str, str]]]] = None,
+                    dims: Optional[Dict[str, str]] = None):
+    """Record a probe result (plus optional targets and gauges) and flush them as one export.
+
+    `dims` labels the result with target dimensions, e.g. {"collection": "sentinel2-l2a"}.
+    """
+    unknown = set(dims or {}) - set(TARGET_DIMENSIONS)
+    if unknown:
+        raise ValueError(f"unknown target dimensions {sorted(unknown)}, expected one of {TARGET_DIMENSIONS}")
+    session = get_session(service, team=team, datacenter=datacenter)
+    session.record_result(success, duration_s, dims, targets=targets)
+    session.record_usage()
+    trace.set_result(success)
+    for name, value, gauge_attrs in gauges or ():
+        session.gauge(name, value, gauge_attrs)
+    if session.flush():
+        log.info("otel metrics flushed  service=%s  success=%s  duration=%.2fs", service, success, float(duration_s))
+
+
+def push_phases(service: str, *, team: str = "access", datacenter: str = "vienna"):
+    """Export the phase timings and anything else recorded for a script that reports no overall result."""
+    session = get_session(service, team=team, datacenter=datacenter)
+    session.record_usage()
+    if session.flush():
+        log.info("otel phases flushed  service=%s", service)
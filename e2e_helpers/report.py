@@ -0,0 +1,83 @@
+import os, math, itertools
+from string import Formatter
+from typing import Iterable, Optional
+
+# REPORT_ROWS_PER_PAGE=0 writes all rows to one page
+ROWS_PER_PAGE = int(os.environ.get("REPORT_ROWS_PER_PAGE", "500"))
+
+
+class Template:
+    """A str.format template, parsed once and rendered many times.
+
+    Fields are plain names looked up in the mapping passed to render();
+    `{{` and `}}` are literal braces, as with str.format.
+    """
+    def __init__(self, text: str):
+        self.parts = []
+        for literal, field, spec, conversion in Formatter().parse(text):
+            if field is not None and not field.isidentifier():
+                raise ValueError(f"template field {field!r} is not a plain name")
+            self.parts.append((literal, field, spec or "", conversion))
+
+    def render(self, fields: dict) -> str:
+        out = []
+        for literal, field, spec, conversion in self.parts:
+            out.append(literal)
+            if field is None:
+                continue
+            value = fields[field]
+            if conversion == "r":
+                value = repr(value)
+            elif conversion == "s":
+                value = str(value)
+            out.append(format(value, spec))
+        return "".join(out)
+
+
+def page_path(html_file: str, page: int) -> str:
+    """docs/index.html for the first page, docs/index_2.html for the second, ..."""
+    if page == 1:
+        return html_file
+    root, ext = os.path.splitext(html_file)
+    return f"{root}_{page}{ext}"
+
+
+def _nav(html_file: str, page: int, pages: int) -> str:
+    if pages == 1:
+        return ""
+    links = [
+        f"<strong>{p}</strong>" if p == page else f'<a href="{os.path.basename(page_path(html_file, p))}">{p}</a>'
+        for p in range(1, pages + 1)
+    ]
+    return f'<nav class="pages">Page {" ".join(links)}</nav>'
+
+
+def write_pages(html_file: str, head: Template, row: Template, tail: Template, rows: Iterable[dict], total: int,
+                fields: Optional[dict] = None, rows_per_page: int = ROWS_PER_PAGE) -> int:
+    """Stream `rows` into HTML pages of at most `rows_per_page` rows and return the number of pages.
+
+    Each page is head, its rows and tail; `fields` fill head and tail, along
+    with `nav` (links to all pages) and `page`. Rows are rendered and written
+    one at a time, so memory does not grow with `total`. Every page is
+    written to a temporary file and moved into place; pages left over from
+    an earlier, longer report are removed.
+    """
+    pages = max(1, math.ceil(total / rows_per_page)) if rows_per_page > 0 else 1
+    per_page = rows_per_page if rows_per_page > 0 else None
+    rows = iter(rows)
+    os.makedirs(os.path.dirname(html_file) or ".", exist_ok=True)
+    for page in range(1, pages + 1):
+        path = page_path(html_file, page)
+        context = {**(fields or {}), "nav": _nav(html_file, page, pages), "page": page}
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(head.render(context))
+            for fields_of_row in itertools.islice(rows, per_page):
+                f.write(row.render(fields_of_row))
+            f.write(tail.render(context))
+        os.replace(tmp, path)
+    stale = pages + 1
+    while os.path.exists(page_path(html_file, stale)):
+        os.remove(page_path(html_file, stale))
+        stale += 1
+    return pages
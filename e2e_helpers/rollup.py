@@ -0,0 +1,154 @@
+import json, math, time, sqlite3
+from typing import Optional
+
+RESOLUTIONS = {"1h": 3600, "1d": 86400}
+ZERO_BIN = -(1 << 30)
+# window -> (length, resolution of the buckets it is served from); see summary() for the window edges
+WINDOWS = {"24h": (86400, "1h"), "7d": (7 * 86400, "1d"), "30d": (30 * 86400, "1d")}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    service        TEXT NOT NULL,
+    target         TEXT NOT NULL,
+    resolution     TEXT NOT NULL,
+    bucket         INTEGER NOT NULL,
+    success        INTEGER NOT NULL DEFAULT 0,
+    failure        INTEGER NOT NULL DEFAULT 0,
+    duration_sum   REAL NOT NULL DEFAULT 0,
+    duration_count INTEGER NOT NULL DEFAULT 0,
+    sketch         TEXT,
+    PRIMARY KEY (service, resolution, bucket, target)
+);
+"""
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with a relative error of `accuracy` (DDSketch-style).
+
+    Positive values are counted in logarithmic bins; merging two sketches
+    adds their bin counts, so bucket sketches combine into window sketches
+    without keeping the raw values.
+    """
+    def __init__(self, bins: Optional[dict] = None, accuracy: float = 0.01):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.bins = {int(k): v for k, v in (bins or {}).items()}
+
+    def _index(self, value: float) -> int:
+        # ZERO_BIN collects zero and negative values
+        return math.ceil(math.log(value, self.gamma)) if value > 0 else ZERO_BIN
+
+    def add(self, value: float, count: int = 1):
+        index = self._index(value)
+        self.bins[index] = self.bins.get(index, 0) + count
+
+    def merge(self, other: "QuantileSketch"):
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+
+    @property
+    def count(self) -> int:
+        return sum(self.bins.values())
+
+    def quantile(self, q: float) -> Optional[float]:
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                return 0.0 if index == ZERO_BIN else 2 * self.gamma ** index / (self.gamma + 1)
+        return None
+
+    def to_json(self) -> str:
+        return json.dumps(self.bins, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text: Optional[str]) -> "QuantileSketch":
+        return cls(json.loads(text) if text else None)
+
+
+def update(conn: sqlite3.Connection, service: str, target: Optional[str], ok: bool, duration: Optional[float],
+           ts: float):
+    """Add one result to its hourly and daily buckets; runs inside the caller's transaction."""
+    for resolution, seconds in RESOLUTIONS.items():
+        bucket = int(ts // seconds * seconds)
+        key = (service, target or "", resolution, bucket)
+        row = conn.execute("SELECT sketch FROM rollups WHERE service = ? AND target = ? AND resolution = ? "
+                           "AND bucket = ?", key).fetchone()
+        sketch = QuantileSketch.from_json(row[0] if row else None)
+        if duration is not None:
+            sketch.add(duration)
+        conn.execute("""
+            INSERT INTO rollups (service, target, resolution, bucket,
+                                 success, failure, duration_sum, duration_count, sketch)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (service, resolution, bucket, target) DO UPDATE SET
+                success = success + excluded.success,
+                failure = failure + excluded.failure,
+                duration_sum = duration_sum + excluded.duration_sum,
+                duration_count = duration_count + excluded.duration_count,
+                sketch = excluded.sketch""",
+                     (*key, int(ok), int(not ok), duration or 0.0, int(duration is not None), sketch.to_json()))
+
+
+def rebuild(conn: sqlite3.Connection):
+    """Recompute all rollups from the results table."""
+    with conn:
+        conn.execute("DELETE FROM rollups")
+        for service, target, status, duration, ts in conn.execute(
+                "SELECT service, target, status, duration, ts FROM results ORDER BY id").fetchall():
+            update(conn, service, target, status in ("SUCCESS", "SKIPPED"), duration, ts)
+
+
+def _aggregate(rows) -> dict:
+    success = failure = duration_count = 0
+    duration_sum = 0.0
+    sketch = QuantileSketch()
+    for s, f, d_sum, d_count, text in rows:
+        success, failure = success + s, failure + f
+        duration_sum, duration_count = duration_sum + d_sum, duration_count + d_count
+        sketch.merge(QuantileSketch.from_json(text))
+    total = success + failure
+    return {
+        "success": success,
+        "failure": failure,
+        "availability": success / total if total else None,
+        "mean_duration": duration_sum / duration_count if duration_count else None,
+        "p95_duration": sketch.quantile(0.95),
+    }
+
+
+def summary(conn: sqlite3.Connection, service: str, window: str = "24h", *, target: Optional[str] = None,
+            now: Optional[float] = None) -> dict:
+    """Availability, result counts, mean and p95 duration of a service over a window (24h, 7d or 30d).
+
+    Reads at most one bucket per hour or day of the window, independent of
+    the length of the history. The window is made of whole buckets, hourly
+    for 24h and daily (UTC) for 7d and 30d, starting with the bucket that
+    holds `now` minus the window length. It therefore covers up to one
+    bucket more than its nominal length; "since" in the result is the
+    actual start. `target=None` covers all targets of the service, "" only
+    its untargeted results.
+    """
+    seconds, resolution = WINDOWS[window]
+    now = time.time() if now is None else now
+    start = int((now - seconds) // RESOLUTIONS[resolution] * RESOLUTIONS[resolution])
+    where, args = "service = ? AND resolution = ? AND bucket >= ?", [service, resolution, start]
+    if target is not None:
+        where, args = where + " AND target = ?", args + [target]
+    return {**_aggregate(conn.execute(
+        f"SELECT success, failure, duration_sum, duration_count, sketch FROM rollups WHERE {where}", args)),
+        "since": start}
+
+
+def buckets(conn: sqlite3.Connection, service: str, resolution: str, start: float, end: float) -> list:
+    """(bucket, summary) of every non-empty `resolution` bucket of a service in [start, end), all targets merged."""
+    rows = {}
+    for bucket, *row in conn.execute(
+            "SELECT bucket, success, failure, duration_sum, duration_count, sketch FROM rollups "
+            "WHERE service = ? AND resolution = ? AND bucket >= ? AND bucket < ? ORDER BY bucket",
+            [service, resolution, start, end]):
+        rows.setdefault(bucket, []).append(row)
+    return [(bucket, _aggregate(bucket_rows)) for bucket, bucket_rows in rows.items()]
@@ -0,0 +1,221 @@
+import os, re, gzip, json, time, fcntl, logging
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, Optional
+from e2e_helpers.logtail import tail_lines
+
+# length of the period one segment covers, and how long closed segments are kept (0 keeps them forever)
+SEGMENT_DAYS = float(os.environ.get("LOG_SEGMENT_DAYS", "7"))
+RETENTION_DAYS = float(os.environ.get("LOG_RETENTION_DAYS", "365"))
+# lines between two (ts, offset) entries of a segment in the index
+INDEX_EVERY = 64
+
+TIMESTAMP = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}(?::\d{2})?)")
+
+log = logging.getLogger(__name__)
+
+
+def line_ts(line: str) -> Optional[float]:
+    """Epoch time of the local timestamp a probe log line starts with, None if it has none."""
+    m = TIMESTAMP.match(line)
+    if not m:
+        return None
+    text = m.group(1)
+    return datetime.strptime(text, "%Y-%m-%d %H:%M:%S" if len(text) > 16 else "%Y-%m-%d %H:%M").timestamp()
+
+
+class SegmentedLog:
+    """Append-only probe log stored as time-bounded segments with a time-range index.
+
+    The log `results/logs/test_openEO.log` lives in the directory
+    `results/logs/test_openEO/`. A new segment starts every `segment_days`;
+    closed segments are gzipped and dropped after `retention_days`.
+    index.json lists the segments in order, each with the time of its first
+    and last line and a (ts, byte offset) entry every INDEX_EVERY lines, so
+    read() only opens the segments overlapping the requested window and
+    skips to the right place in them. Offsets count uncompressed bytes.
+
+    An existing plain log file at `path` is split into segments on the first
+    append; until then, readers see it as a single open segment. Appends
+    from concurrent probes are serialised with a lock file. Readers take no
+    lock and create nothing: index.json is replaced atomically.
+    """
+    def __init__(self, path: str, segment_days: float = SEGMENT_DAYS, retention_days: float = RETENTION_DAYS):
+        self.legacy_path = path
+        self.directory = os.path.splitext(path)[0]
+        self.index_path = os.path.join(self.directory, "index.json")
+        self.segment_seconds = segment_days * 86400
+        self.retention = retention_days * 86400
+
+    @contextmanager
+    def _locked(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                index = self._load()
+                if os.path.exists(self.legacy_path):
+                    self._migrate(index)
+                yield index
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _load(self) -> dict:
+        if not os.path.exists(self.index_path):
+            return {"segments": []}
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save(self, index: dict):
+        tmp = f"{self.index_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f, separators=(",", ":"))
+        os.replace(tmp, self.index_path)
+
+    def _period(self, ts: float) -> int:
+        return int(ts // self.segment_seconds * self.segment_seconds)
+
+    def _file(self, segment: dict) -> str:
+        return os.path.join(self.directory, segment["file"])
+
+    def _append(self, index: dict, line: str, ts: float):
+        segments = index["segments"]
+        period = self._period(ts)
+        if not segments or segments[-1]["closed"] or segments[-1]["period"] != period:
+            if segments and not segments[-1]["closed"]:
+                self._close(segments[-1])
+            self._expire(index, ts)
+            segments = index["segments"]
+            name = datetime.fromtimestamp(period).strftime("%Y%m%dT%H%M%S")
+            segments.append({"file": f"{name}.log", "period": period, "start": ts, "end": ts, "lines": 0,
+                             "offsets": [], "closed": False})
+        segment = segments[-1]
+        with open(self._file(segment), "ab") as f:
+            offset = f.tell()
+            f.write(line.rstrip("\n").encode("utf-8") + b"\n")
+        if segment["lines"] % INDEX_EVERY == 0:
+            segment["offsets"].append([ts, offset])
+        segment["lines"] += 1
+        segment["start"], segment["end"] = min(segment["start"], ts), max(segment["end"], ts)
+
+    def _close(self, segment: dict):
+        path = self._file(segment)
+        # mtime=0 keeps the compressed segment reproducible
+        with open(path, "rb") as src, gzip.GzipFile(f"{path}.gz.tmp", "wb", mtime=0) as dst:
+            dst.write(src.read())
+        os.replace(f"{path}.gz.tmp", f"{path}.gz")
+        os.remove(path)
+        segment["file"] += ".gz"
+        segment["closed"] = True
+
+    def _expire(self, index: dict, now: float):
+        if not self.retention:
+            return
+        keep = []
+        for segment in index["segments"]:
+            if segment["closed"] and segment["end"] < now - self.retention:
+                os.remove(self._file(segment))
+                log.info("log segment %s expired", self._file(segment))
+            else:
+                keep.append(segment)
+        index["segments"] = keep
+
+    def _migrate(self, index: dict):
+        """Split the plain log file into segments, in front of any segments written since."""
+        existing, index["segments"] = index["segments"], []
+        with open(self.legacy_path, "r", encoding="utf-8", errors="replace") as f:
+            last = None
+            for line in f:
+                # lines without timestamp stay in the segment of the line before them
+                ts = line_ts(line) or last or time.time()
+                self._append(index, line, ts)
+                last = ts
+        if index["segments"] and existing:
+            self._close(index["segments"][-1])
+        index["segments"] += existing
+        self._save(index)
+        os.remove(self.legacy_path)
+        log.info("log %s moved into segments under %s", self.legacy_path, self.directory)
+
+    def append(self, line: str, ts: Optional[float] = None):
+        """Append one line, starting a new segment (and compressing the last one) at a period boundary."""
+        with self._locked() as index:
+            self._append(index, line, time.time() if ts is None else ts)
+            self._save(index)
+
+    def segments(self) -> list:
+        """Index entries of all segments, oldest first, including a plain log file not split yet."""
+        segments = self._load()["segments"]
+        if os.path.exists(self.legacy_path):
+            # in front of any segments, as _migrate puts it; period -1 matches no real segment
+            segments.insert(0, {"file": os.path.abspath(self.legacy_path), "period": -1, "start": float("-inf"),
+                                "end": float("inf"), "lines": None, "offsets": [], "closed": False})
+        return segments
+
+    def _open(self, segment: dict):
+        path = self._file(segment)
+        if not segment["closed"] and not os.path.exists(path) and os.path.exists(f"{path}.gz"):
+            # compressed by an append since the index was read
+            return gzip.open(f"{path}.gz", "rb")
+        return gzip.open(path, "rb") if segment["closed"] else open(path, "rb")
+
+    def read(self, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[str]:
+        """Lines with a timestamp in [start, end], oldest first; only overlapping segments are opened.
+
+        Lines without a timestamp are returned along with the lines around them.
+        """
+        for segment in self.segments():
+            if (start is not None and segment["end"] < start) or (end is not None and segment["start"] > end):
+                continue
+            offset = 0
+            for ts, entry_offset in segment["offsets"]:
+                if start is None or ts > start:
+                    break
+                offset = entry_offset
+            with self._open(segment) as f:
+                f.seek(offset)
+                for raw in f:
+                    line = raw.decode("utf-8", errors="replace").rstrip("\n")
+                    ts = line_ts(line)
+                    if ts is not None and start is not None and ts < start:
+                        continue
+                    if ts is not None and end is not None and ts > end:
+                        break
+                    yield line
+
+    def tail(self, n: int) -> list:
+        """The last `n` lines, across segments."""
+        lines = []
+        for segment in reversed(self.segments()):
+            if len(lines) >= n:
+                break
+            if segment["closed"] or not os.path.exists(self._file(segment)):
+                with self._open(segment) as f:
+                    older = f.read().decode("utf-8", errors="replace").splitlines()
+            else:
+                older = tail_lines(self._file(segment), n)
+            lines = older[-(n - len(lines)):] + lines
+        return lines[-n:] if n else []
+
+    def read_new(self, cursor: dict) -> list:
+        """Lines appended since `cursor` ({"segment", "offset"}, empty for a first read), which is updated in place.
+
+        cursor["reset"] is set when reading starts over from the first
+        segment: on a first read, or when the cursor's segment has expired.
+        """
+        segments = self.segments()
+        periods = [segment["period"] for segment in segments]
+        cursor["reset"] = cursor.get("segment") not in periods
+        first = 0 if cursor["reset"] else periods.index(cursor["segment"])
+        offset = 0 if cursor["reset"] else cursor.get("offset", 0)
+        lines = []
+        for segment in segments[first:]:
+            with self._open(segment) as f:
+                f.seek(offset)
+                data = f.read()
+            # a trailing line without newline is left for the next read
+            end = data.rfind(b"\n") + 1
+            lines += data[:end].decode("utf-8", errors="replace").splitlines()
+            cursor.update(segment=segment["period"], offset=offset + end)
+            offset = 0
+        return lines
@@ -0,0 +1,119 @@
+import os, gzip, json
+from datetime import datetime, timezone
+from typing import Optional
+from e2e_helpers import store
+
+# resolution -> strftime format of the period one shard covers
+SHARDS = {"raw": "%Y-%m-%d", "1h": "%Y-%m", "1d": "%Y"}
+
+
+def period_start(resolution: str, ts: float) -> datetime:
+    """Start (UTC) of the shard period of `resolution` that holds `ts`."""
+    t = datetime.fromtimestamp(ts, timezone.utc)
+    if resolution == "raw":
+        return t.replace(hour=0, minute=0, second=0, microsecond=0)
+    if resolution == "1h":
+        return t.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return t.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_period(resolution: str, start: datetime) -> datetime:
+    if resolution == "raw":
+        return datetime.fromtimestamp(start.timestamp() + 86400, timezone.utc)
+    if resolution == "1h":
+        return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return start.replace(year=start.year + 1)
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 3)
+
+
+def raw_columns(results: list) -> dict:
+    """Columnar arrays of raw results; statuses and targets are dictionary-encoded."""
+    statuses, targets = {}, {}
+    return {
+        "ts": [int(r.ts) for r in results],
+        "status": [statuses.setdefault(r.status, len(statuses)) for r in results],
+        "duration": [_round(r.duration) for r in results],
+        "target": [None if r.target is None else targets.setdefault(r.target, len(targets)) for r in results],
+        "statuses": list(statuses),
+        "targets": list(targets),
+    }
+
+
+def bucket_columns(buckets: list) -> dict:
+    """Columnar arrays of rollup buckets."""
+    return {
+        "ts": [bucket for bucket, _ in buckets],
+        "success": [s["success"] for _, s in buckets],
+        "failure": [s["failure"] for _, s in buckets],
+        "mean_duration": [_round(s["mean_duration"]) for _, s in buckets],
+        "p95_duration": [_round(s["p95_duration"]) for _, s in buckets],
+    }
+
+
+def shard_path(out_dir: str, service: str, resolution: str, period: str) -> str:
+    return os.path.join(out_dir, service, resolution, f"{period}.json.gz")
+
+
+def _write_gzip_json(data, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    # mtime=0 keeps unchanged shards byte-identical between builds
+    with gzip.GzipFile(tmp, "wb", compresslevel=9, mtime=0) as f:
+        f.write(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+    os.replace(tmp, path)
+
+
+def write_series(out_dir: str, since: Optional[float] = None, *, now: Optional[float] = None,
+                 path: str = store.RESULTS_DB) -> float:
+    """Write the time series of every service in the result store as gzipped, columnar JSON shards.
+
+    Each service has raw results in daily shards, hourly buckets in monthly
+    shards and daily buckets in yearly shards, under
+    <out_dir>/<service>/<resolution>/<period>.json.gz, listed in
+    <out_dir>/index.json. Only shards of periods that hold results newer
+    than `since` are rewritten; since=None, or a missing index, rewrites
+    all. Returns the time to pass as `since` to the next build.
+    """
+    now = datetime.now(timezone.utc).timestamp() if now is None else now
+    index_path = os.path.join(out_dir, "index.json")
+    if not os.path.exists(index_path):
+        since = None
+    for service, (first, last) in store.time_range(path=path).items():
+        start = first if since is None else max(first, since)
+        if start > last:
+            continue
+        for resolution, fmt in SHARDS.items():
+            period = period_start(resolution, start)
+            while period.timestamp() <= last:
+                end = next_period(resolution, period)
+                if resolution == "raw":
+                    columns = raw_columns(store.between(service, period.timestamp(), end.timestamp(), path=path))
+                else:
+                    columns = bucket_columns(store.buckets(service, resolution, period.timestamp(), end.timestamp(),
+                                                           path=path))
+                if columns["ts"]:
+                    _write_gzip_json({"service": service, "resolution": resolution, "period": period.strftime(fmt),
+                                      **columns},
+                                     shard_path(out_dir, service, resolution, period.strftime(fmt)))
+                period = end
+    write_index(out_dir, now)
+    return now
+
+
+def write_index(out_dir: str, generated: float):
+    """List all shards on disk as {service: {resolution: [period, ...]}}."""
+    shards = {}
+    for service in sorted(os.listdir(out_dir)) if os.path.isdir(out_dir) else []:
+        for resolution in SHARDS:
+            directory = os.path.join(out_dir, service, resolution)
+            if os.path.isdir(directory):
+                shards.setdefault(service, {})[resolution] = sorted(
+                    name[:-len(".json.gz")] for name in os.listdir(directory) if name.endswith(".json.gz"))
+    os.makedirs(out_dir, exist_ok=True)
+    tmp = os.path.join(out_dir, "index.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump({"generated": int(generated), "shards": shards}, f, separators=(",", ":"))
+    os.replace(tmp, os.path.join(out_dir, "index.json"))
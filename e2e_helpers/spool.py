@@ -0,0 +1,71 @@
+import os, struct, logging, threading
+
+log = logging.getLogger(__name__)
+_HEADER = struct.Struct(">I")
+
+
+class Spool:
+    """Local file of length-prefixed binary records, capped at max_bytes.
+
+    Appending past the cap evicts the oldest records first.
+    """
+    def __init__(self, path: str, max_bytes: int = 1 << 20):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def read(self) -> list:
+        """All records, oldest first. A truncated tail record is ignored."""
+        with self._lock:
+            return self._read()
+
+    def _read(self) -> list:
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "rb") as f:
+            data = f.read()
+        records, pos = [], 0
+        while pos + _HEADER.size <= len(data):
+            (size,) = _HEADER.unpack_from(data, pos)
+            if pos + _HEADER.size + size > len(data):
+                log.warning("spool %s: dropping truncated record at byte %d", self.path, pos)
+                break
+            records.append(data[pos + _HEADER.size:pos + _HEADER.size + size])
+            pos += _HEADER.size + size
+        return records
+
+    def append(self, record: bytes):
+        if _HEADER.size + len(record) > self.max_bytes:
+            log.error("spool %s: record of %d bytes exceeds the cap, dropped", self.path, len(record))
+            return
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            if size + _HEADER.size + len(record) <= self.max_bytes:
+                with open(self.path, "ab") as f:
+                    f.write(_HEADER.pack(len(record)) + record)
+                return
+            records = self._read() + [record]
+            total = sum(_HEADER.size + len(r) for r in records)
+            while total > self.max_bytes:
+                total -= _HEADER.size + len(records.pop(0))
+                log.warning("spool %s: evicted oldest record", self.path)
+            self._write(records)
+
+    def replace(self, records: list):
+        """Replace all records, e.g. with those left after a partial replay."""
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._write(records)
+
+    def clear(self):
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def _write(self, records: list):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "wb") as f:
+            for record in records:
+                f.write(_HEADER.pack(len(record)) + record)
+        os.replace(tmp, self.path)
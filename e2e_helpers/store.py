@@ -0,0 +1,144 @@
+import os, json, time, uuid, sqlite3
+from contextlib import closing
+from typing import NamedTuple, Optional
+from e2e_helpers import rollup
+
+RESULTS_DB = os.environ.get("RESULTS_DB", "results/results.db")
+# all results recorded by this process belong to one run
+RUN_ID = uuid.uuid4().hex
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id       INTEGER PRIMARY KEY,
+    ts       REAL NOT NULL,
+    service  TEXT NOT NULL,
+    target   TEXT,
+    status   TEXT NOT NULL,
+    duration REAL,
+    message  TEXT NOT NULL DEFAULT '',
+    extra    TEXT,
+    run      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_service_ts ON results (service, ts);
+CREATE INDEX IF NOT EXISTS results_service_target_ts ON results (service, target, ts);
+CREATE INDEX IF NOT EXISTS results_service_run ON results (service, run);
+"""
+COLUMNS = "ts, service, target, status, duration, message, extra, run"
+OK_STATUSES = ("SUCCESS", "SKIPPED")
+
+
+class Result(NamedTuple):
+    ts: float
+    service: str
+    target: Optional[str]
+    status: str
+    duration: Optional[float]
+    message: str
+    extra: Optional[dict]
+    run: str
+
+    @property
+    def ok(self) -> bool:
+        return self.status in OK_STATUSES
+
+
+def connect(path: str = RESULTS_DB) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.executescript(SCHEMA + rollup.SCHEMA)
+    # databases written before the rollups existed
+    if conn.execute("SELECT NOT EXISTS (SELECT 1 FROM rollups) AND EXISTS (SELECT 1 FROM results)").fetchone()[0]:
+        rollup.rebuild(conn)
+    return conn
+
+
+def _result(row) -> Result:
+    return Result(*row[:6], json.loads(row[6]) if row[6] else None, row[7])
+
+
+def record(service: str, status: str, *, target: Optional[str] = None, message: str = "",
+           duration: Optional[float] = None, extra: Optional[dict] = None, ts: Optional[float] = None,
+           path: str = RESULTS_DB):
+    """Store one result and add it to the rollups; status is SUCCESS, FAILURE, SKIPPED, INVALID or ERROR."""
+    row = (time.time() if ts is None else ts, service, target, status.upper(), duration, message,
+           json.dumps(extra) if extra else None, RUN_ID)
+    with closing(connect(path)) as conn, conn:
+        conn.execute(f"INSERT INTO results ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row)
+        rollup.update(conn, service, target, row[3] in OK_STATUSES, duration, row[0])
+
+
+def merge(source: str, *, path: str = RESULTS_DB) -> int:
+    """Add the results of the store at `source` that are not in `path` yet; returns the number added.
+
+    Results are matched on service, run, target and time, so merging the
+    same store again adds nothing.
+    """
+    with closing(sqlite3.connect(f"file:{source}?mode=ro", uri=True)) as src:
+        rows = src.execute(f"SELECT {COLUMNS} FROM results ORDER BY id").fetchall()
+    added = 0
+    with closing(connect(path)) as conn, conn:
+        for row in rows:
+            if conn.execute("SELECT 1 FROM results WHERE service = ? AND run = ? AND ts = ? AND target IS ?",
+                            (row[1], row[7], row[0], row[2])).fetchone():
+                continue
+            conn.execute(f"INSERT INTO results ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row)
+            rollup.update(conn, row[1], row[2], row[3] in OK_STATUSES, row[4], row[0])
+            added += 1
+    return added
+
+
+def latest(service: str, limit: int = 100, *, target: Optional[str] = None, path: str = RESULTS_DB) -> list:
+    """The last `limit` results of a service (or one of its targets), oldest first."""
+    where, args = ("service = ?", [service]) if target is None else ("service = ? AND target = ?", [service, target])
+    with closing(connect(path)) as conn:
+        rows = conn.execute(f"SELECT {COLUMNS} FROM results WHERE {where} ORDER BY ts DESC LIMIT ?",
+                            [*args, limit]).fetchall()
+    return [_result(row) for row in reversed(rows)]
+
+
+def latest_per_target(service: str, *, path: str = RESULTS_DB) -> list:
+    """The most recent result of every target of a service, ordered by target."""
+    with closing(connect(path)) as conn:
+        rows = conn.execute(f"""
+            SELECT {COLUMNS} FROM results AS r
+            WHERE service = ? AND target IS NOT NULL AND ts = (
+                SELECT MAX(ts) FROM results WHERE service = r.service AND target = r.target)
+            ORDER BY target""", [service]).fetchall()
+    return [_result(row) for row in rows]
+
+
+def summary(service: str, window: str = "24h", *, target: Optional[str] = None, path: str = RESULTS_DB) -> dict:
+    """Availability and duration statistics over 24h, 7d or 30d from the rollups, see rollup.summary."""
+    with closing(connect(path)) as conn:
+        return rollup.summary(conn, service, window, target=target)
+
+
+def between(service: str, start: float, end: float, *, path: str = RESULTS_DB) -> list:
+    """All results of a service with start <= ts < end, oldest first."""
+    with closing(connect(path)) as conn:
+        rows = conn.execute(f"SELECT {COLUMNS} FROM results WHERE service = ? AND ts >= ? AND ts < ? ORDER BY ts",
+                            [service, start, end]).fetchall()
+    return [_result(row) for row in rows]
+
+
+def buckets(service: str, resolution: str, start: float, end: float, *, path: str = RESULTS_DB) -> list:
+    """Hourly ("1h") or daily ("1d") rollup buckets of a service in [start, end), see rollup.buckets."""
+    with closing(connect(path)) as conn:
+        return rollup.buckets(conn, service, resolution, start, end)
+
+
+def time_range(*, path: str = RESULTS_DB) -> dict:
+    """{service: (first ts, last ts)} of all services in the store."""
+    with closing(connect(path)) as conn:
+        return {service: (first, last) for service, first, last in conn.execute(
+            "SELECT service, MIN(ts), MAX(ts) FROM results GROUP BY service")}
+
+
+def last_run(service: str, *, path: str = RESULTS_DB) -> list:
+    """All results of the most recent run of a service, oldest first."""
+    with closing(connect(path)) as conn:
+        rows = conn.execute(f"""
+            SELECT {COLUMNS} FROM results
+            WHERE run = (SELECT run FROM results WHERE service = ? ORDER BY ts DESC LIMIT 1) AND service = ?
+            ORDER BY ts""", [service, service]).fetchall()
+    return [_result(row) for row in rows]
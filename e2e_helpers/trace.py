@@ -0,0 +1,132 @@
+import os, sys, atexit, logging, threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+OTEL_ENDPOINT = os.environ.get("OTEL_ENDPOINT", "https://otel.infra.eodc.eu/v1/metrics")
+OTEL_TRACES_ENDPOINT = os.environ.get("OTEL_TRACES_ENDPOINT", OTEL_ENDPOINT.replace("/v1/metrics", "/v1/traces"))
+OTEL_API_KEY = os.environ.get("OTEL_API_KEY")
+# OTEL_TRACES=0 disables tracing
+TRACES = os.environ.get("OTEL_TRACES", "1") != "0"
+
+log = logging.getLogger(__name__)
+_local = threading.local()
+_lock = threading.Lock()
+_provider = None
+_root = None
+
+
+def service_resource(service: str, team: str = "access", datacenter: str = "vienna") -> Resource:
+    """Resource attributes shared by the metrics and traces of a probe."""
+    return Resource(attributes={
+        "environment":  os.environ.get("E2E_ENV", "dev"),
+        "service.name": service,
+        "datacenter":   datacenter,
+        "team":         team,
+    })
+
+
+def _spans() -> list:
+    if not hasattr(_local, "spans"):
+        _local.spans = []
+    return _local.spans
+
+
+def start_probe(service: str, *, team: str = "access", datacenter: str = "vienna"):
+    """Open the root span of this probe run; spans opened later in any thread become its descendants.
+
+    Spans are exported in the background by a batch span processor.
+    """
+    global _provider, _root
+    if not TRACES:
+        return None
+    with _lock:
+        if _root is not None:
+            return _root
+        headers = {"Authorization": f"Bearer {OTEL_API_KEY}"} if OTEL_API_KEY else {}
+        _provider = TracerProvider(resource=service_resource(service, team, datacenter), shutdown_on_exit=False)
+        _provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=OTEL_TRACES_ENDPOINT, headers=headers)))
+        # named after the script, several probes report under the same service
+        name = os.path.splitext(os.path.basename(sys.argv[0]))[0] or service
+        _root = _provider.get_tracer("eodc.e2e").start_span(name, attributes={"eodc.e2e.service": service})
+        return _root
+
+
+@atexit.register
+def end_probe():
+    """End the root span and deliver all pending spans."""
+    global _root
+    with _lock:
+        root, _root = _root, None
+    if root is None:
+        return
+    root.end()
+    if not _provider.force_flush():
+        log.error("otel trace export FAILED — spans not delivered to %s", OTEL_TRACES_ENDPOINT)
+    _provider.shutdown()
+
+
+@contextmanager
+def probe(service: str, *, team: str = "access", datacenter: str = "vienna"):
+    """Trace everything inside the block as one probe run."""
+    root = start_probe(service, team=team, datacenter=datacenter)
+    try:
+        yield root
+    except Exception as e:
+        if root is not None:
+            root.record_exception(e)
+            root.set_status(Status(StatusCode.ERROR, str(e)))
+        raise
+    finally:
+        end_probe()
+
+
+def set_result(success: bool):
+    """Mark the root span with the probe result."""
+    root = _root
+    if root is not None:
+        root.set_attribute("eodc.e2e.success", success)
+        if not success:
+            root.set_status(Status(StatusCode.ERROR, "probe failed"))
+
+
+@contextmanager
+def span(name: str, attrs: Optional[Dict[str, str]] = None, kind: SpanKind = SpanKind.INTERNAL):
+    """Child span of the innermost open span of this thread, or of the root span.
+
+    Yields None when no probe is being traced.
+    """
+    root = _root
+    if root is None or getattr(_local, "untraced", False):
+        yield None
+        return
+    stack = _spans()
+    parent = stack[-1] if stack else root
+    s = _provider.get_tracer("eodc.e2e").start_span(name, context=trace.set_span_in_context(parent), kind=kind,
+                                                     attributes=attrs)
+    stack.append(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.record_exception(e)
+        s.set_status(Status(StatusCode.ERROR, str(e)))
+        raise
+    finally:
+        stack.pop()
+        s.end()
+
+
+@contextmanager
+def untraced():
+    """Open no spans in this thread inside the block, e.g. for the telemetry exports themselves."""
+    previous = getattr(_local, "untraced", False)
+    _local.untraced = True
+    try:
+        yield
+    finally:
+        _local.untraced = previous
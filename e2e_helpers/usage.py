@@ -0,0 +1,26 @@
+import sys, resource
+from e2e_helpers import http_client
+
+
+def _rss_bytes(maxrss: int) -> int:
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def snapshot() -> dict:
+    """Resource usage of this process since it started.
+
+    CPU time and peak RSS of the process itself and of its terminated child
+    processes (e.g. pip in a venv setup), plus the HTTP requests and bytes
+    sent/received through e2e_helpers.http_client; see http_client.stats()
+    for which clients that covers.
+    """
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        "cpu_seconds": own.ru_utime + own.ru_stime,
+        "peak_rss_bytes": _rss_bytes(own.ru_maxrss),
+        "children_cpu_seconds": children.ru_utime + children.ru_stime,
+        "children_peak_rss_bytes": _rss_bytes(children.ru_maxrss),
+        **http_client.stats(),
+    }
@@ -0,0 +1,82 @@
+import itertools, logging
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from e2e_helpers import http_client
+
+log = logging.getLogger(__name__)
+
+
+def load_zmetadata(session: requests.Session, url: str, timeout: float = 15) -> dict:
+    """Fetch the consolidated metadata of the zarr (v2) group at `url`."""
+    r = session.get(f"{url}/.zmetadata", timeout=timeout)
+    r.raise_for_status()
+    return r.json()["metadata"]
+
+
+def time_variables(metadata: dict) -> list:
+    """Names of all arrays with a leading time dimension, excluding coordinates."""
+    names = []
+    for key, zattrs in metadata.items():
+        if not key.endswith("/.zattrs"):
+            continue
+        name = key[:-len("/.zattrs")]
+        dims = zattrs.get("_ARRAY_DIMENSIONS", [])
+        if f"{name}/.zarray" in metadata and len(dims) > 1 and dims[0] == "time":
+            names.append(name)
+    return sorted(names)
+
+
+def expected_chunk_keys(metadata: dict, name: str, t: int = -1) -> list:
+    """Chunk keys of array `name` that hold timestep `t`."""
+    zarray = metadata[f"{name}/.zarray"]
+    shape, chunks = zarray["shape"], zarray["chunks"]
+    sep = zarray.get("dimension_separator") or "."
+    if t < 0:
+        t += shape[0]
+    grid = [[t // chunks[0]]] + [range(-(-n // c)) for n, c in zip(shape[1:], chunks[1:])]
+    return [f"{name}/" + sep.join(map(str, idx)) for idx in itertools.product(*grid)]
+
+
+def chunk_inventory(url: str, *, t: int = -1, session: requests.Session = None, max_workers: int = 16,
+                    timeout: float = 15) -> dict:
+    """Confirm with HEAD requests which chunks of timestep `t` exist.
+
+    Zarr v2 does not store chunks that hold only the fill_value
+    (write_empty_chunks=False), so an absent chunk may just be no-data,
+    e.g. at the swath edges of an S2 tile. Absent chunks are therefore
+    looked up again at timestep t-1: a chunk absent at t but present at t-1
+    is reported as missing. When t and t-1 share a chunk along time, absent
+    chunks cannot be told apart from no-data and are never missing.
+    Only the consolidated metadata and the response headers are transferred.
+    Returns {variable: {"absent": [keys], "missing": [keys]}} for all
+    time-indexed variables.
+    """
+    session = session or http_client.session()
+    metadata = load_zmetadata(session, url, timeout)
+    names = time_variables(metadata)
+    if t < 0 and names:
+        t += metadata[f"{names[0]}/.zarray"]["shape"][0]
+    keys = {name: expected_chunk_keys(metadata, name, t) for name in names}
+
+    def exists(key):
+        try:
+            return session.head(f"{url}/{key}", timeout=timeout).status_code == 200
+        except requests.RequestException as e:
+            log.warning("HEAD %s/%s failed: %s", url, key, e)
+            return False
+
+    inventory = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for name, name_keys in keys.items():
+            absent = [key for key, found in zip(name_keys, pool.map(exists, name_keys)) if not found]
+            previous = dict(zip(expected_chunk_keys(metadata, name, t), expected_chunk_keys(metadata, name, t - 1)))
+            before = [previous[key] for key in absent if t > 0 and previous[key] != key]
+            present_before = {key for key, found in zip(before, pool.map(exists, before)) if found}
+            inventory[name] = {"absent": absent,
+                               "missing": [key for key in absent if previous[key] in present_before]}
+    return inventory
+
+
+def missing_chunks(url: str, **kwargs) -> dict:
+    """{variable: [keys]} of the chunks of timestep `t` that are missing, see chunk_inventory."""
+    return {name: found["missing"] for name, found in chunk_inventory(url, **kwargs).items()}
@@ -0,0 +1,61 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from e2e_helpers import store
+import generate_dashboard
+import update_html_report_api
+import update_html_report_notebook
+
+def write_stac_report(status_data, checkpoint):
+    collections_status, availability = update_html_report_api.from_status(status_data["STAC API"])
+    if not collections_status:
+        print("No collections data found, keeping the previous STAC report.")
+        return False
+    update_html_report_api.generate_html(collections_status, update_html_report_api.HTML_FILE, availability)
+    return True
+
+def write_notebook_report(status_data, checkpoint):
+    notebook_status = update_html_report_notebook.from_status(status_data["Notebooks"])
+    if not notebook_status:
+        print("No notebook data found, keeping the previous notebook report.")
+        return False
+    update_html_report_notebook.generate_html(notebook_status, update_html_report_notebook.HTML_FILE)
+    return True
+
+def write_dashboard(status_data, checkpoint):
+    generate_dashboard.write_dashboard(status_data, checkpoint)
+    return True
+
+# outputs fed from the status collected in one pass: name -> writer(status_data, checkpoint),
+# which returns False if it had no data and left its output as it was
+writers = {
+    "dashboard data": write_dashboard,
+    "STAC report": write_stac_report,
+    "notebook report": write_notebook_report,
+}
+
+def main(sources=()):
+    """Build the dashboard data and both HTML reports, reading the store and each log once.
+
+    The result stores in `sources`, e.g. those of the probe workflows, are
+    first merged into the result store. Every output is written to a
+    temporary file and moved into place, so a failing writer leaves the
+    previous version of its output intact.
+    """
+    for source in sources:
+        print(f"Merged {store.merge(source)} results from {source}")
+    checkpoint = generate_dashboard.load_checkpoint()
+    status_data = generate_dashboard.collect_status(checkpoint)
+    failed = []
+    for name, write in writers.items():
+        try:
+            if write(status_data, checkpoint):
+                print(f"Built {name}")
+        except Exception as e:
+            print(f"Building {name} FAILED: {e}")
+            failed.append(name)
+    generate_dashboard.save_checkpoint(checkpoint)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,9 +1,23 @@
 import os
+import sys
 import json
+import sqlite3
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from e2e_helpers import store
+from e2e_helpers.rollup import WINDOWS
+from e2e_helpers.segments import SegmentedLog
+from e2e_helpers.series import write_series
+from e2e_helpers.logtail import read_new_lines
 
 log_dir = "results/logs"
 docs_dir = "docs"
 json_file = os.path.join(docs_dir, "status_data.json")
+# current status without history, and the per-service time series shards
+status_file = os.path.join(docs_dir, "status.json")
+series_dir = os.path.join(docs_dir, "series")
+# log offsets and aggregated state of the full-history views
+checkpoint_file = "results/dashboard_checkpoint.json"
 
 services = {
     "Dask Gateway": "test_DaskGateway.log",
@@ -13,124 +27,259 @@ services = {
     "Openstack": "test_openstack.log"
 }
 
-status_data = {}
+# service names in the result store
+store_services = {
+    "Dask Gateway": "dask_gateway",
+    "openEO API": "openeo",
+    "STAC API": "stac",
+    "Notebooks": "notebooks",
+    "Openstack": "openstack"
+}
+
+# bumped when the aggregated state in the checkpoint changes shape
+CHECKPOINT_VERSION = 3
+
+def parse_tail(lines, service_name):
+    """Status and history of the tail window of a Dask Gateway, openEO or OpenStack log."""
+    if service_name == "Dask Gateway":
+        history = []
+        for line in lines:
+            parts = line.strip().split(" - ")
+            if len(parts) == 2:
+                timestamp, status = parts
+                history.append({"timestamp": timestamp, "status": 1 if status == "SUCCESS" else 0})
+        last_line = lines[-1].strip()
+        parts = last_line.split(" - ")
+        current_timestamp, current_status = parts[0], parts[1]
+        return current_timestamp, current_status, {"history": history}
+
+    elif service_name == "openEO API":
+        history = []
+        for line in lines:
+            parts = line.strip().split(", ")
+            if len(parts) == 3:
+                timestamp, status, coll = parts
+                history.append({
+                    "timestamp": timestamp,
+                    "status": 1 if status.lower() == "success" else 0,
+                    "collection": coll.replace("collection: ", "")
+                })
+
+        last_line = lines[-1].strip()
+        parts = last_line.split(", ")
+
+        return parts[0], parts[1].upper(), {
+            "collection": parts[2].replace("collection: ", ""),
+            "history": history
+        }
+
+    elif service_name == "Openstack":
+        history = []
+        for line in lines:
+            parts = line.strip().split(", ")
+            if len(parts) == 3:
+                timestamp, status, info = parts
+                history.append({
+                    "timestamp": timestamp,
+                    "status": 1 if status.lower() == "success" else 0,
+                    "info": info.replace("info: ", "")
+                })
+
+        last_line = lines[-1].strip()
+        parts = last_line.split(", ")
+
+        return parts[0], parts[1].upper(), {
+            "info": parts[2].replace("info: ", ""),
+            "history": history
+        }
+
+def fold_lines(lines, service_name, state):
+    """Fold new lines of the STAC API or Notebooks log into the aggregated state of the whole log."""
+    if service_name == "STAC API":
+        stac_collections_dict = state.setdefault("collections", {})
+        for line in lines:
+            try:
+                parts = line.strip().split(", ")
+                timestamp = parts[0]
+                status = parts[1].upper()
+                collection = parts[2].replace("collection: ", "")
+                item = parts[3].replace("item: ", "")
+
+                if collection not in stac_collections_dict or timestamp > stac_collections_dict[collection]["timestamp"]:
+                    stac_collections_dict[collection] = {
+                        "collection": collection,
+                        "timestamp": timestamp,
+                        "status": status,
+                        "item": item
+                    }
+            except IndexError:
+                continue
+
+    elif service_name == "Notebooks":
+        notebook_results = state.setdefault("notebooks", [])
+        for line in lines:
+            parts = line.strip().split(" - ")
+            if len(parts) >= 4:
+                state["last_timestamp"] = parts[0]
+                notebook_results.append({
+                    "notebook": parts[-1],
+                    "status": parts[1],
+                    "message": parts[-2],
+                    "timestamp": parts[0]
+                })
+
+def parse_log_entry(file_path, service_name, checkpoint):
+    """Status of a service from its log.
 
-def parse_log_entry(file_path, service_name):
+    Tail-window services only read the last lines of the log. STAC API and
+    Notebooks need the whole log: their aggregated state and the position
+    read so far are kept in `checkpoint`, so each run only parses the lines
+    appended since the previous one. All logs but the Notebooks one, which
+    holds a single run, are segmented logs.
+    """
     try:
-        with open(file_path, "r") as file:
-            lines = file.readlines()
-            if not lines:
+        if service_name in ("STAC API", "Notebooks"):
+            entry = checkpoint.setdefault(service_name, {"cursor": {}, "state": {}})
+            if service_name == "Notebooks":
+                lines = read_new_lines(file_path, entry["cursor"])
+            else:
+                lines = SegmentedLog(file_path).read_new(entry["cursor"])
+            if entry["cursor"]["reset"]:
+                entry["state"] = {}
+            fold_lines(lines, service_name, entry["state"])
+            if not entry["cursor"].get("offset"):
                 return "Never Tested", "UNKNOWN", None
+            if service_name == "STAC API":
+                return "Latest Collections", "Filtered Results", list(entry["state"].get("collections", {}).values())
+            return entry["state"].get("last_timestamp"), "Notebook Results", entry["state"].get("notebooks", [])
 
-            if service_name == "Dask Gateway":
-                history = []
-                for line in lines[-100:]:
-                    parts = line.strip().split(" - ")
-                    if len(parts) == 2:
-                        timestamp, status = parts
-                        history.append({"timestamp": timestamp, "status": 1 if status == "SUCCESS" else 0})
-                last_line = lines[-1].strip()
-                parts = last_line.split(" - ")
-                current_timestamp, current_status = parts[0], parts[1]
-                return current_timestamp, current_status, {"history": history}
-            
-            elif service_name == "openEO API":
-                history = []
-                for line in lines[-100:]:
-                    parts = line.strip().split(", ")
-                    if len(parts) == 3:
-                        timestamp, status, coll = parts
-                        history.append({
-                            "timestamp": timestamp,
-                            "status": 1 if status.lower() == "success" else 0,
-                            "collection": coll.replace("collection: ", "")
-                        })
-                
-                last_line = lines[-1].strip()
-                parts = last_line.split(", ")
-
-                return parts[0], parts[1].upper(), {
-                    "collection": parts[2].replace("collection: ", ""),
-                    "history": history
-                }
-
-            elif service_name == "STAC API":
-                stac_collections_dict = {}
-
-                for line in lines:
-                    try:
-                        parts = line.strip().split(", ")
-                        timestamp = parts[0]
-                        status = parts[1].upper()
-                        collection = parts[2].replace("collection: ", "")
-                        item = parts[3].replace("item: ", "")
-
-                        if collection not in stac_collections_dict or timestamp > stac_collections_dict[collection]["timestamp"]:
-                            stac_collections_dict[collection] = {
-                                "collection": collection,
-                                "timestamp": timestamp,
-                                "status": status,
-                                "item": item
-                            }
-                    except IndexError:
-                        continue
-
-                return "Latest Collections", "Filtered Results", list(stac_collections_dict.values())
-
-            elif service_name == "Notebooks":
-                last_timestamp = None
-                notebook_results = []
-
-                for line in lines:
-                    parts = line.strip().split(" - ")
-                    if len(parts) >= 4:
-                        last_timestamp = parts[0]
-                        notebook_results.append({
-                            "notebook": parts[-1],
-                            "status": parts[1],
-                            "message": parts[-2]
-                        })
-                return last_timestamp, "Notebook Results", notebook_results
-            
-            elif service_name == "Openstack":
-                history = []
-                for line in lines[-10:]:
-                    parts = line.strip().split(", ")
-                    if len(parts) == 3:
-                        timestamp, status, info = parts
-                        history.append({
-                            "timestamp": timestamp,
-                            "status": 1 if status.lower() == "success" else 0,
-                            "info": info.replace("info: ", "")
-                        })
-                
-                last_line = lines[-1].strip()
-                parts = last_line.split(", ")
-
-                return parts[0], parts[1].upper(), {
-                    "info": parts[2].replace("info: ", ""),
-                    "history": history
-                }
+        lines = SegmentedLog(file_path).tail(10 if service_name == "Openstack" else 100)
+        if not lines:
+            return "Never Tested", "UNKNOWN", None
+        return parse_tail(lines, service_name)
 
     except Exception as e:
         return "Never Tested", "ERROR", None
 
-for service_name, log_file in services.items():
-    log_path = os.path.join(log_dir, log_file)
-    result = parse_log_entry(log_path, service_name)
+def load_checkpoint(path=checkpoint_file):
+    if not os.path.exists(path):
+        return {"version": CHECKPOINT_VERSION}
+    try:
+        with open(path, "r") as file:
+            checkpoint = json.load(file)
+    except ValueError:
+        checkpoint = {}
+    # a checkpoint of another version is dropped and the logs are read again from the start
+    if checkpoint.get("version") != CHECKPOINT_VERSION:
+        return {"version": CHECKPOINT_VERSION}
+    return checkpoint
+
+def write_json(data, path, **kwargs):
+    """Write `data` as JSON to a temporary file and move it into place."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as file:
+        json.dump(data, file, **kwargs)
+    os.replace(tmp, path)
+
+def save_checkpoint(checkpoint, path=checkpoint_file):
+    write_json(checkpoint, path)
+
+def format_ts(ts):
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
+def read_store(service_name):
+    """Same result as parse_log_entry, read from the result store; None if it holds no results for the service."""
+    service = store_services[service_name]
+
+    if service_name == "STAC API":
+        rows = store.latest_per_target(service)
+        if not rows:
+            return None
+        return "Latest Collections", "Filtered Results", [
+            {"collection": r.target, "timestamp": format_ts(r.ts), "status": r.status, "item": "N/A"} for r in rows
+        ]
 
-    if result is None:
-        timestamp, status, extra_info = "Never Tested", "ERROR", None
-    else:
-        timestamp, status, extra_info = result
+    if service_name == "Notebooks":
+        rows = store.last_run(service)
+        if not rows:
+            return None
+        return format_ts(rows[-1].ts), "Notebook Results", [
+            {"notebook": r.target, "status": r.status, "message": r.message, "timestamp": format_ts(r.ts)}
+            for r in rows
+        ]
 
-    status_data[service_name] = {
-        "timestamp": timestamp,
-        "status": status,
-        "extra_info": extra_info
-    }
+    rows = store.latest(service, 10 if service_name == "Openstack" else 100)
+    if not rows:
+        return None
+    last = rows[-1]
+    history = [{"timestamp": format_ts(r.ts), "status": 1 if r.ok else 0} for r in rows]
+    if service_name == "openEO API":
+        for entry, r in zip(history, rows):
+            entry["collection"] = r.target
+        return format_ts(last.ts), last.status, {"collection": last.target, "history": history}
+    if service_name == "Openstack":
+        for entry, r in zip(history, rows):
+            entry["info"] = r.message
+        return format_ts(last.ts), last.status, {"info": last.message, "history": history}
+    return format_ts(last.ts), last.status, {"history": history}
+
+def collect_status(checkpoint):
+    """status_data.json content: status, details and rollups of every service, each source read once."""
+    status_data = {}
+    for service_name, log_file in services.items():
+        log_path = os.path.join(log_dir, log_file)
+        try:
+            result = read_store(service_name)
+        except sqlite3.Error as e:
+            print(f"Result store not readable, falling back to {log_path}: {e}")
+            result = None
+        if result is None:
+            result = parse_log_entry(log_path, service_name, checkpoint)
+
+        if result is None:
+            timestamp, status, extra_info = "Never Tested", "ERROR", None
+        else:
+            timestamp, status, extra_info = result
+
+        status_data[service_name] = {
+            "timestamp": timestamp,
+            "status": status,
+            "extra_info": extra_info
+        }
+        # availability and p95 duration per window, served from the rollups
+        try:
+            status_data[service_name]["rollup"] = {
+                window: store.summary(store_services[service_name], window) for window in WINDOWS
+            }
+        except sqlite3.Error as e:
+            print(f"Rollups not readable for {service_name}: {e}")
+    return status_data
+
+def current_status(status_data):
+    """status_data without the history lists, which the time series shards hold."""
+    current = {}
+    for service_name, entry in status_data.items():
+        extra_info = entry["extra_info"]
+        if isinstance(extra_info, dict):
+            extra_info = {key: value for key, value in extra_info.items() if key != "history"}
+        current[service_name] = {**entry, "extra_info": extra_info}
+    return current
+
+def write_dashboard(status_data, checkpoint):
+    """Write status_data.json, status.json and the time series shards that changed since the last build."""
+    write_json(status_data, json_file, separators=(",", ":"))
+    write_json(current_status(status_data), status_file, separators=(",", ":"))
+    try:
+        checkpoint["series_built"] = write_series(series_dir, checkpoint.get("series_built"))
+    except sqlite3.Error as e:
+        print(f"Result store not readable, time series not written: {e}")
 
-os.makedirs(docs_dir, exist_ok=True)
+def main():
+    checkpoint = load_checkpoint()
+    status_data = collect_status(checkpoint)
+    write_dashboard(status_data, checkpoint)
+    save_checkpoint(checkpoint)
 
-with open(json_file, "w") as file:
-    json.dump(status_data, file, indent=4)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Local stand-in for the OTLP/HTTP collector.
+
+Prints every received metrics request and every trace as a span tree;
+--status 503 simulates an outage.
+
+    python scripts/otlp_receiver.py --port 4318 [--status 503]
+    OTEL_ENDPOINT=http://localhost:4318/v1/metrics python scripts/test_stac_api.py
+"""
+import argparse
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from opentelemetry.proto.collector.metrics.v1.metrics_service_pb2 import ExportMetricsServiceRequest
+from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import ExportTraceServiceRequest
+
+
+def describe_metrics(body: bytes):
+    request = ExportMetricsServiceRequest()
+    request.ParseFromString(body)
+    for resource_metrics in request.resource_metrics:
+        attrs = {kv.key: kv.value.string_value for kv in resource_metrics.resource.attributes}
+        for scope_metrics in resource_metrics.scope_metrics:
+            for metric in scope_metrics.metrics:
+                kind = metric.WhichOneof("data")
+                for point in getattr(metric, kind).data_points:
+                    ts = datetime.fromtimestamp(point.time_unix_nano / 1e9, timezone.utc).isoformat(timespec="seconds")
+                    labels = {kv.key: kv.value.string_value for kv in point.attributes}
+                    if kind == "histogram":
+                        value = f"count={point.count} sum={point.sum:.3f}"
+                    else:
+                        value = point.as_double if point.HasField("as_double") else point.as_int
+                    print(f"  {ts} {attrs.get('service.name')} {metric.name} {labels} {value}", flush=True)
+
+
+def describe_traces(body: bytes):
+    request = ExportTraceServiceRequest()
+    request.ParseFromString(body)
+    spans = [(resource_spans.resource, span) for resource_spans in request.resource_spans
+             for scope_spans in resource_spans.scope_spans for span in scope_spans.spans]
+    # spans arrive in batches, a parent may be in another request: those are printed as roots
+    ids = {span.span_id for _, span in spans}
+    children = {}
+    for resource, span in sorted(spans, key=lambda item: item[1].start_time_unix_nano):
+        parent = span.parent_span_id if span.parent_span_id in ids else None
+        children.setdefault(parent, []).append((resource, span))
+
+    def show(parent, depth):
+        for resource, span in children.get(parent, []):
+            attrs = {kv.key: getattr(kv.value, kv.value.WhichOneof("value"))
+                     for kv in span.attributes if not kv.key.startswith("http.timing.")}
+            status = " ERROR" if span.status.code == span.status.STATUS_CODE_ERROR else ""
+            duration = (span.end_time_unix_nano - span.start_time_unix_nano) / 1e6
+            if depth == 0:
+                service = next((kv.value.string_value for kv in resource.attributes if kv.key == "service.name"), None)
+                print(f"  trace {span.trace_id.hex()[:8]} service={service}", flush=True)
+            print(f"  {'  ' * depth}{span.name} {duration:.1f}ms{status} {attrs}", flush=True)
+            show(span.span_id, depth + 1)
+
+    show(None, 0)
+
+
+class Handler(BaseHTTPRequestHandler):
+    status = 200
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        print(f"POST {self.path} {len(body)} bytes -> {self.status}", flush=True)
+        if self.path.endswith("/v1/metrics"):
+            describe_metrics(body)
+        elif self.path.endswith("/v1/traces"):
+            describe_traces(body)
+        self.send_response(self.status)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=4318)
+    parser.add_argument("--status", type=int, default=200)
+    args = parser.parse_args()
+    Handler.status = args.status
+    ThreadingHTTPServer(("", args.port), Handler).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,20 +2,32 @@
 import os, sys, time, traceback
 from datetime import datetime
 from unittest.mock import patch
-from dask.distributed import Client
+from dask.distributed import Client, wait
 from eodc.dask import EODCDaskGateway
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from e2e_helpers import store
+from e2e_helpers.phases import phase
+from e2e_helpers.segments import SegmentedLog
 from e2e_helpers.prom import push_e2e_result
+from e2e_helpers.trace import probe
 
 LOG_PATH = "results/logs/test_DaskGateway.log"
 SERVICE = "dask_gateway"
+# benchmark runs are kept apart from the Dask Gateway health check
+BENCH_LOG_PATH = "results/logs/test_DaskBenchmark.log"
+BENCH_SERVICE = "dask_benchmark"
+# DASK_BENCHMARK=1 measures cluster start-up and throughput, DASK_LOCAL=1 runs it on a LocalCluster
+BENCHMARK = os.getenv("DASK_BENCHMARK") == "1"
+LOCAL = os.getenv("DASK_LOCAL") == "1"
+BENCH_WORKERS = int(os.getenv("DASK_BENCH_WORKERS", "2"))
+BENCH_TASKS = int(os.getenv("DASK_BENCH_TASKS", "2000"))
+BENCH_ARRAY = int(os.getenv("DASK_BENCH_ARRAY", "4000"))
+BENCH_TIMEOUT = float(os.getenv("DASK_BENCH_TIMEOUT", "600"))
 
-def log_result(success: bool, msg: str = ""):
-    os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
+def log_result(success: bool, msg: str = "", path: str = LOG_PATH):
     ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(LOG_PATH, "a", encoding="utf-8") as f:
-        f.write(f"{ts} - {'SUCCESS' if success else 'FAILURE'}{(' - '+msg) if msg else ''}\n")
+    SegmentedLog(path).append(f"{ts} - {'SUCCESS' if success else 'FAILURE'}{(' - '+msg) if msg else ''}")
 
 class CustomEODCDaskGateway(EODCDaskGateway):
     def __init__(self, username, password):
@@ -24,6 +36,7 @@ class CustomEODCDaskGateway(EODCDaskGateway):
     def _authenticate(self):
         return self._password
 
+@phase("connect")
 def create_and_connect_cluster(gateway):
     try:
         cluster = gateway.new_cluster()
@@ -34,6 +47,7 @@ def create_and_connect_cluster(gateway):
         log_result(False, f"connect: {e}")
         return None, None
 
+@phase("compute")
 def test_simple_computation(client) -> bool:
     try:
         res = client.submit(lambda x, y: x + y, 5, 10).result()
@@ -42,7 +56,89 @@ def test_simple_computation(client) -> bool:
         log_result(False, f"compute: {e}")
         return False
 
+def _inc(x):
+    return x + 1
+
+def benchmark(new_cluster, n_workers=BENCH_WORKERS, n_tasks=BENCH_TASKS, size=BENCH_ARRAY):
+    """Measure cluster start-up and throughput.
+
+    Returns scheduler_ready_seconds (new_cluster() until the scheduler answers),
+    workers_ready_seconds (scale(n_workers) until all have joined),
+    tasks_per_second (n_tasks tiny tasks) and shuffle_bytes_per_second
+    (row- to column-chunk rechunk of a size x size float64 array).
+    """
+    import dask.array as da
+    results = {}
+    t = time.perf_counter()
+    with phase("new_cluster"):
+        cluster = new_cluster()
+        client = Client(cluster)
+    try:
+        client.scheduler_info()
+        results["scheduler_ready_seconds"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        with phase("scale"):
+            cluster.scale(n_workers)
+            client.wait_for_workers(n_workers, timeout=BENCH_TIMEOUT)
+        results["workers_ready_seconds"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        with phase("tasks"):
+            client.gather(client.map(_inc, range(n_tasks), pure=False))
+        results["tasks_per_second"] = n_tasks / (time.perf_counter() - t)
+
+        x = client.persist(da.random.random((size, size), chunks=(max(1, size // 8), size)))
+        wait(x)
+        t = time.perf_counter()
+        with phase("shuffle"):
+            client.compute(x.rechunk((size, max(1, size // 8))).sum()).result()
+        results["shuffle_bytes_per_second"] = x.nbytes / (time.perf_counter() - t)
+    finally:
+        client.close()
+        cluster.close()
+    return results
+
+def run_benchmark():
+    t0 = time.time()
+    success = False
+    results = {}
+    error = ""
+    kind = "local" if LOCAL else "gateway"
+    try:
+        if LOCAL:
+            from dask.distributed import LocalCluster
+            results = benchmark(lambda: LocalCluster(n_workers=0, threads_per_worker=1))
+        else:
+            user = os.getenv("EODC_USERNAME")
+            pwd = os.getenv("EODC_PASSWORD")
+            if not user or not pwd:
+                raise RuntimeError("missing EODC_USERNAME/EODC_PASSWORD")
+            with patch("getpass.getpass", return_value=pwd):
+                gw = CustomEODCDaskGateway(username=user, password=pwd)
+            results = benchmark(gw.new_cluster)
+        success = True
+    except Exception as e:
+        error = f"benchmark: {e}"
+        print(traceback.format_exc(), flush=True)
+    for name, value in results.items():
+        print(f"{name}: {value:.3f}")
+    summary = " ".join([f"{name}={value:.3f}" for name, value in results.items()] + ([error] if error else []))
+    log_result(success, summary, BENCH_LOG_PATH)
+    store.record(BENCH_SERVICE, "SUCCESS" if success else "FAILURE", target=kind, message=summary,
+                 duration=time.time() - t0, extra=results)
+    attrs = {"cluster": kind, "workers": str(BENCH_WORKERS)}
+    try:
+        push_e2e_result(BENCH_SERVICE, success, time.time() - t0,
+                        gauges=[(f"eodc_e2e_dask_{name}", value, attrs) for name, value in results.items()])
+    except Exception:
+        pass
+    if not success:
+        raise SystemExit(1)
+
 def main():
+    if BENCHMARK:
+        return run_benchmark()
     t0 = time.time()
     success = False
     cluster = client = None
@@ -53,7 +149,8 @@ def main():
         raise SystemExit(1)
     try:
         with patch("getpass.getpass", return_value=pwd):
-            gw = CustomEODCDaskGateway(username=user, password=pwd)
+            with phase("authenticate"):
+                gw = CustomEODCDaskGateway(username=user, password=pwd)
             cluster, client = create_and_connect_cluster(gw)
             success = test_simple_computation(client) if client else False
     except Exception as e:
@@ -68,6 +165,7 @@ def main():
             if cluster: cluster.close()
         except: pass
         log_result(success)
+        store.record(SERVICE, "SUCCESS" if success else "FAILURE", duration=time.time() - t0)
         try:
             push_e2e_result(SERVICE, success, time.time() - t0)
         except Exception:
@@ -76,4 +174,5 @@ def main():
         raise SystemExit(1)
 
 if __name__ == "__main__":
-    main()
+    with probe(BENCH_SERVICE if BENCHMARK else SERVICE):
+        main()
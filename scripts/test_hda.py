@@ -1,21 +1,105 @@
 #!/usr/bin/env python3
-import os, sys, time, requests
+import os, sys, time, random, struct
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import zarr
 import numpy as np
 import pandas as pd
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from e2e_helpers.prom import push_e2e_result
+from e2e_helpers.trace import probe
+from e2e_helpers import http_client, store
+from e2e_helpers.phases import phase
+from e2e_helpers.zmeta import chunk_inventory
 
 LOG = "results/logs/test_s2_datacube.log"
-SERVICE = "s2-datacube"
+SERVICE = "hda"
 PATH = "https://data.eodc.eu/collections/S2-L2A-C1"
+CHECKS = set(os.environ.get("S2_CHECKS", "pixels").split(","))
+COG_URL = "https://data.eodc.eu/collections/SENTINEL1_SIG0_20M/V1M2R3/EQUI7_EU020M/E048N015T3/SIG0_20260412T171426__VV_A015_E048N015T3_EU020M_V1M2R3_S1CIWGRDH_TUWIEN.tif"
+COG_SAMPLE_TILES = int(os.environ.get("HDA_SAMPLE_TILES", "16"))
+COG_WORKERS = int(os.environ.get("HDA_WORKERS", "8"))
+HEADER_BYTES = 64 * 1024
+# TIFF field type -> struct format
+TIFF_TYPES = {1: "B", 2: "c", 3: "H", 4: "I", 6: "b", 7: "B", 8: "h", 9: "i", 11: "f", 12: "d", 16: "Q", 17: "q", 18: "Q"}
+TILE_OFFSETS, TILE_BYTE_COUNTS, STRIP_OFFSETS, STRIP_BYTE_COUNTS = 324, 325, 273, 279
 
 def ok(resp):
     if not (200 <= resp.status_code < 300):
         return False, f"HTTP {resp.status_code}"
     return True, "OK"
 
+def fetch_range(session, url, start, length, timeout=15):
+    """GET bytes [start, start + length) of url; returns (response, body)."""
+    r = session.get(url, headers={"Range": f"bytes={start}-{start + length - 1}"}, stream=True, timeout=timeout)
+    if r.status_code != 206:
+        r.close()
+        raise RuntimeError(f"HTTP {r.status_code} for ranged read of {url}")
+    return r, r.content
+
+def tile_index(head, read):
+    """Offsets and byte counts of the internal tiles (or strips) of the first TIFF image.
+
+    `head` holds the first bytes of the file, `read(offset, size)` fetches
+    anything that lies beyond it.
+    """
+    order = {b"II": "<", b"MM": ">"}[head[:2]]
+    version = struct.unpack(order + "H", head[2:4])[0]
+    big = version == 43
+    ifd = struct.unpack(order + ("Q" if big else "I"), head[8:16] if big else head[4:8])[0]
+
+    def get(offset, size):
+        return head[offset:offset + size] if offset + size <= len(head) else read(offset, size)
+
+    count_fmt, entry_size, inline = ("Q", 20, 8) if big else ("H", 12, 4)
+    n = struct.unpack(order + count_fmt, get(ifd, struct.calcsize(count_fmt)))[0]
+    entries = get(ifd + struct.calcsize(count_fmt), n * entry_size)
+    tags = {}
+    for i in range(n):
+        entry = entries[i * entry_size:(i + 1) * entry_size]
+        tag, typ = struct.unpack(order + "HH", entry[:4])
+        if tag not in (TILE_OFFSETS, TILE_BYTE_COUNTS, STRIP_OFFSETS, STRIP_BYTE_COUNTS):
+            continue
+        count = struct.unpack(order + ("Q" if big else "I"), entry[4:12] if big else entry[4:8])[0]
+        fmt = f"{order}{count}{TIFF_TYPES[typ]}"
+        size = struct.calcsize(fmt)
+        raw = entry[12:12 + size] if big else entry[8:8 + size]
+        if size > inline:
+            pointer = struct.unpack(order + ("Q" if big else "I"), entry[12:20] if big else entry[8:12])[0]
+            raw = get(pointer, size)
+        tags[tag] = struct.unpack(fmt, raw)
+    if TILE_OFFSETS in tags:
+        return tags[TILE_OFFSETS], tags[TILE_BYTE_COUNTS]
+    return tags[STRIP_OFFSETS], tags[STRIP_BYTE_COUNTS]
+
+@phase("cog_benchmark")
+def cog_benchmark(url, session, n_tiles=COG_SAMPLE_TILES, workers=COG_WORKERS):
+    """Read the GeoTIFF header with a Range request and a random sample of its tiles concurrently.
+
+    `session` is an http_client session. Returns ttfb_seconds of the header
+    request (without DNS, connect and TLS time), tiles_per_second and
+    mb_per_second of the sampled tile reads.
+    """
+    with phase("header"):
+        r, head = fetch_range(session, url, 0, HEADER_BYTES)
+        # time to first byte alone; r.elapsed also includes DNS, connect and TLS
+        ttfb = r.timings["ttfb"]
+        offsets, counts = tile_index(head, lambda offset, size: fetch_range(session, url, offset, size)[1])
+    tiles = [i for i in range(len(offsets)) if counts[i]]
+    sample = random.sample(tiles, min(n_tiles, len(tiles)))
+    if not sample:
+        raise RuntimeError(f"no tiles in {url}")
+
+    t = time.perf_counter()
+    with phase("tiles"), ThreadPoolExecutor(max_workers=workers) as pool:
+        sizes = list(pool.map(lambda i: len(fetch_range(session, url, offsets[i], counts[i])[1]), sample))
+    elapsed = time.perf_counter() - t
+    return {
+        "ttfb_seconds": ttfb,
+        "tiles_per_second": len(sample) / elapsed,
+        "mb_per_second": sum(sizes) / elapsed / 1e6,
+    }
+
 def main():
     t0 = time.time()
     service = SERVICE
@@ -23,15 +107,28 @@ def main():
     try:
         msg = ""
         success = True
-        r = requests.get(f"{PATH}/T33UWP/indices/.zmetadata", timeout=15)
+        bench = {}
+        absent = {}
+        with phase("zmetadata"):
+            r = http_client.get(f"{PATH}/T33UWP/indices/.zmetadata", timeout=15)
         okc, msgc = ok(r)
         if not okc:
             success, msg = False, f"Check hda: {PATH}/T33UWP/indices/.zmetadata {msgc}"
         else:
-            r = requests.get(f"https://data.eodc.eu/collections/SENTINEL1_SIG0_20M/V1M2R3/EQUI7_EU020M/E048N015T3/SIG0_20260412T171426__VV_A015_E048N015T3_EU020M_V1M2R3_S1CIWGRDH_TUWIEN.tif", timeout=15)
-            okc, msgc = ok(r)
-            if not okc:
-                success, msg = False, f"Check hda: https://data.eodc.eu/collections/SENTINEL1_SIG0_20M/V1M2R3/EQUI7_EU020M/E048N015T3/SIG0_20260412T171426__VV_A015_E048N015T3_EU020M_V1M2R3_S1CIWGRDH_TUWIEN.tif {msgc}"
+            if "inventory" in CHECKS:
+                with phase("inventory"):
+                    inventory = chunk_inventory(f"{PATH}/T33UWP/indices")
+                # absent chunks can be no-data, only those the previous timestep had are missing
+                absent = {var: len(found["absent"]) for var, found in inventory.items()}
+                missing = {var: found["missing"] for var, found in inventory.items() if found["missing"]}
+                if missing:
+                    success = False
+                    msg += f"Check hda: {PATH}/T33UWP/indices missing chunks: " + ", ".join(f"{var} ({len(keys)})" for var, keys in missing.items()) + "\n"
+            try:
+                bench = cog_benchmark(COG_URL, http_client.session())
+                print(" ".join(f"{name}={value:.3f}" for name, value in bench.items()))
+            except Exception as e:
+                success, msg = False, msg + f"Check hda: {COG_URL} {e}"
 
     except Exception as e:
         success, msg = False, f"Exception: {e}"
@@ -39,10 +136,14 @@ def main():
     ts = datetime.now().strftime("%Y-%m-%d %H:%M")
     line = f"{ts} - {'SUCCESS' if success else 'FAILURE:'} {msg}"
     print(line)
+    store.record(service, "SUCCESS" if success else "FAILURE", message=msg, duration=time.time() - t0, extra=bench)
 
-    push_e2e_result(service, success, time.time() - t0)
+    push_e2e_result(service, success, time.time() - t0,
+                    gauges=[(f"eodc_e2e_hda_{name}", value, {}) for name, value in bench.items()]
+                    + [("eodc_e2e_hda_absent_chunks", count, {"band": var}) for var, count in absent.items()])
     if not success:
         raise SystemExit(1)
 
 if __name__ == "__main__":
-    main()
+    with probe(SERVICE):
+        main()
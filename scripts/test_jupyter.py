@@ -1,4 +1,3 @@
-import requests
 import json
 import time
 import os
@@ -8,7 +7,10 @@ import sys
 nest_asyncio.apply()
 from websocket import create_connection
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__))) 
+from e2e_helpers import http_client, store
+from e2e_helpers.phases import phase
 from e2e_helpers.prom import push_e2e_result
+from e2e_helpers.trace import probe
 
 ENDPOINT_URL = os.getenv("URL")
 USER = os.getenv("USER")
@@ -35,18 +37,20 @@ class jupyter_test:
             flag = 1
         return flag
 
+    @phase("start_server")
     def start_server(self):
-        r = requests.post(f"{self.endpoint}/hub/api/users/{self.user}/server", 
-                          headers=self.headers)
+        r = http_client.post(f"{self.endpoint}/hub/api/users/{self.user}/server", 
+                             headers=self.headers)
         return self.status_code(r), r
     
+    @phase("spawn")
     def wait_start(self):
         timeout = 300 
         interval = 5   
         elapsed = 0
 
         while elapsed < timeout:
-            status = requests.get(f"{self.endpoint}/hub/api/users/{self.user}", headers=self.headers).json()
+            status = http_client.get(f"{self.endpoint}/hub/api/users/{self.user}", headers=self.headers).json()
             if status.get("servers", {}).get("", {}).get("ready", False):
                 print("Server is ready!")
                 break
@@ -55,11 +59,13 @@ class jupyter_test:
         else:
             raise TimeoutError("Server did not start within the expected time.")
     
+    @phase("kernel_start")
     def start_kernel(self):
-        r = requests.post(f"{self.endpoint}/user/{self.user}/api/kernels", 
-                          headers=self.headers)
+        r = http_client.post(f"{self.endpoint}/user/{self.user}/api/kernels", 
+                             headers=self.headers)
         return self.status_code(r), r.json()["id"]
     
+    @phase("start_session")
     def start_session(self, kernel_id):
         session_payload = {
             "name": "",  
@@ -68,11 +74,12 @@ class jupyter_test:
             "kernel": {"id": kernel_id}
         }
 
-        r = requests.post(f"{self.endpoint}/user/{self.user}/api/sessions", 
-                          json=session_payload, 
-                          headers=self.headers)
+        r = http_client.post(f"{self.endpoint}/user/{self.user}/api/sessions", 
+                             json=session_payload, 
+                             headers=self.headers)
         return self.status_code(r), r
     
+    @phase("execute")
     def create_websocket(self, kernel_id):
         ws_url = f"wss://{self.endpoint_ws}/user/{self.user}/api/kernels/{kernel_id}/channels"
         code_to_run = """
@@ -116,8 +123,9 @@ class jupyter_test:
 
         return code_ran
     
+    @phase("stop_server")
     def stop_server(self):
-        r = requests.delete(f"{self.endpoint}/hub/api/users/{self.user}/server", headers=self.headers)
+        r = http_client.delete(f"{self.endpoint}/hub/api/users/{self.user}/server", headers=self.headers)
         return self.status_code(r), r
     
 
@@ -156,5 +164,7 @@ def main():
 
 if __name__ == "__main__":
 
-    success, t0 = main()
-    push_e2e_result(SERVICE, success, time.time() - t0)
+    with probe(SERVICE):
+        success, t0 = main()
+        store.record(SERVICE, "SUCCESS" if success else "FAILURE", duration=time.time() - t0)
+        push_e2e_result(SERVICE, success, time.time() - t0)
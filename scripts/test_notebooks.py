@@ -1,13 +1,21 @@
 import os
+import sys
+import time
 import nbformat
 from datetime import datetime
 from nbformat.reader import NotJSONError
 import subprocess
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from e2e_helpers import store
+from e2e_helpers.phases import phase
+from e2e_helpers.prom import get_session, push_phases
+from e2e_helpers.trace import probe
 
 NOTEBOOK_DIR = "notebooks"
 LOG_DIR = "results/logs"
 LOG_FILE = os.path.join(LOG_DIR, "test_notebooks.log")
 VENV_DIR = ".venv"
+SERVICE = "notebooks"
 
 def clear_log_file():
     """Clear the existing log file before starting new tests."""
@@ -26,7 +34,9 @@ def log_message(notebook_path, status, details=""):
     log_entry = f"{timestamp} - {status} - {details} - {notebook_relative_path}"
     with open(LOG_FILE, "a") as log:
         log.write(log_entry + "\n")
+    store.record(SERVICE, status, target=notebook_relative_path, message=details)
 
+@phase("setup_venv")
 def setup_virtual_environment():
     """Create and activate a virtual environment, then install dependencies."""
     if not os.path.exists(VENV_DIR):
@@ -63,11 +73,11 @@ def extract_imports_from_notebook(notebook_path):
         return None
 
 def check_notebook(notebook_path):
-    """Check a notebook for import errors."""
+    """Check a notebook for import errors; returns False if it is invalid or an import fails."""
     imports = extract_imports_from_notebook(notebook_path)
     
     if imports is None:
-        return
+        return False
     elif imports:
         try:
             for statement in imports:
@@ -75,8 +85,10 @@ def check_notebook(notebook_path):
             log_message(notebook_path, "SUCCESS", "All imports executed successfully")
         except Exception as e:
             log_message(notebook_path, "FAILURE", f"Import Error: {str(e)}")
+            return False
     else:
         log_message(notebook_path, "SKIPPED", "No imports found in notebook")
+    return True
 
 def main():
     clear_log_file()
@@ -94,7 +106,15 @@ def main():
         for file in files:
             if file.endswith(".ipynb"):
                 notebook_path = os.path.join(root, file)
-                check_notebook(notebook_path)
+                notebook = os.path.relpath(notebook_path, NOTEBOOK_DIR)
+                t = time.perf_counter()
+                with phase("notebook", notebook=notebook):
+                    passed = check_notebook(notebook_path)
+                get_session(SERVICE).record_result(passed, time.perf_counter() - t, {"notebook": notebook})
 
 if __name__ == "__main__":
-    main()
+    with probe(SERVICE):
+        try:
+            main()
+        finally:
+            push_phases(SERVICE)
@@ -5,7 +5,11 @@ from datetime import datetime
 import time
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__))) 
+from e2e_helpers.phases import phase
+from e2e_helpers.segments import SegmentedLog
+from e2e_helpers import store
 from e2e_helpers.prom import push_e2e_result
+from e2e_helpers.trace import start_probe
 
 OPENEO_BACKEND = "https://openeo.cloud"
 TOKEN_PATH = os.path.expanduser("~/.openeo-refresh-token")
@@ -13,8 +17,11 @@ TOKEN_PATH = os.path.expanduser("~/.openeo-refresh-token")
 LOG_DIR = "results/logs/"
 LOG_FILE = os.path.join(LOG_DIR, "test_openEO.log")
 
+# the trace covers connecting and authenticating at import; it ends at exit
+start_probe("openeo")
 connection = openeo.connect(OPENEO_BACKEND)
 
+@phase("authenticate")
 def authenticate():
     """Authenticate with openEO using a stored or new refresh token."""
 
@@ -48,17 +55,15 @@ def log_message(status, collection_id):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
     log_entry = f"{timestamp}, {status}, collection: {collection_id}"
     
-    os.makedirs(LOG_DIR, exist_ok=True)
-
     try:
-        with open(LOG_FILE, "a") as log:
-            log.write(log_entry + "\n")
+        SegmentedLog(LOG_FILE).append(log_entry)
     except Exception as e:
         print(f"Error writing to log file: {e}")
 
     print(log_entry)  
 
 
+@phase("list_collections")
 def get_random_collection():
     try:
         collections = connection.list_collections()
@@ -72,6 +77,7 @@ def get_random_collection():
     except Exception as e:
         return None
 
+@phase("load_collection")
 def test_collection(collection_id):
     try:
         collection = connection.load_collection(collection_id)
@@ -92,5 +98,8 @@ if __name__ == "__main__":
     else:
         log_message("failure", "No collection found – test failed.")
         success = False
-        
-    push_e2e_result(service, success, time.time() - t0)
+
+    store.record(service, "SUCCESS" if success else "FAILURE", target=collection_id,
+                 message="" if collection_id else "No collection found", duration=time.time() - t0)
+    push_e2e_result(service, success, time.time() - t0,
+                    dims={"collection": collection_id} if collection_id else None)
@@ -1,89 +1,236 @@
 #!/usr/bin/env python3
-import os, sys, time, requests
-from datetime import datetime, timedelta
+import io, os, sys, json, math, time, threading, tempfile, zipfile
+from concurrent.futures import wait, FIRST_COMPLETED
+from datetime import datetime
 import zarr
+import aiohttp
 import numpy as np
 import pandas as pd
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from e2e_helpers.prom import push_e2e_result
+from e2e_helpers.trace import probe
+from e2e_helpers import http_client, store
+from e2e_helpers.phases import phase
+from e2e_helpers.pool import DaemonPool
+from e2e_helpers.zmeta import chunk_inventory
 
 LOG = "results/logs/test_s2_datacube.log"
 SERVICE = "s2-datacube"
 PATH = "https://data.eodc.eu/collections/S2-L2A-C1"
+MAX_WORKERS = int(os.environ.get("S2_MAX_WORKERS", "8"))
+# "threads": check tiles on this machine, "dask": on Dask Gateway workers next to the data
+EXECUTOR = os.environ.get("S2_EXECUTOR", "threads")
+DASK_WORKERS = int(os.environ.get("S2_DASK_WORKERS", "4"))
+TILE_TIMEOUT = float(os.environ.get("S2_TILE_TIMEOUT", "600"))
+# bound on every single HTTP request of the zarr store, so a hung read cannot outlive the run
+READ_TIMEOUT = float(os.environ.get("S2_READ_TIMEOUT", "120"))
+GROUPS = ("10", "20", "indices")
+CENTER_10M = (6000, 6000)
+CENTER_20M = (3000, 3000)
+# "inventory": metadata-only chunk existence check, "pixels": value checks on the data,
+# "profile": quality stats of the full last timestep of every band; opt-in, as it reads the whole slice
+CHECKS = set(os.environ.get("S2_CHECKS", "pixels").split(","))
+SESSION = http_client.session()
+CHECKPOINTS = os.environ.get("S2_CHECKPOINTS", "results/s2_checkpoints.json")
+# verify the full history of tiles without checkpoint instead of only their latest timestep
+BACKFILL = os.environ.get("S2_BACKFILL") == "1"
 
 tiles = ['T32TNS', 'T32TNT', 'T32TPS', 'T32TPT', 'T32TQS', 'T32TQT', 'T32UQU', 
          'T33TUM', 'T33TUN', 'T33TVM', 'T33TVN', 'T33TWM', 'T33TWN', 'T33TXN', 
          'T33UUP', 'T33UVP', 'T33UVQ', 'T33UWP', 'T33UWQ', 'T33UXP', 'T33UXQ',        
         ]
 
-def check_tile(tile, t=-1):
+class RunCache:
+    """Run-scoped in-memory cache for small remote reads (time axes, time.csv).
+
+    Each key is loaded exactly once per run, also when several tile workers
+    ask for it at the same time. `hits` and `misses` count cache lookups;
+    `misses` equals the number of remote reads made through the cache.
+    """
+    def __init__(self):
+        self._data = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, load):
+        with self._lock:
+            if key in self._data:
+                self.hits += 1
+                return self._data[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in self._data:
+                    self.hits += 1
+                    return self._data[key]
+                self.misses += 1
+            value = load()
+            with self._lock:
+                self._data[key] = value
+        return value
+
+    def stats(self):
+        return f"cache hits={self.hits} misses={self.misses}"
+
+    def __getstate__(self):
+        # shipped to dask workers as an empty cache
+        return {}
+
+    def __setstate__(self, state):
+        self.__init__()
+
+CACHE = RunCache()
+
+def load_time_table():
+    r = SESSION.get(f"{PATH}/time.csv", timeout=READ_TIMEOUT)
+    r.raise_for_status()
+    return pd.read_csv(io.StringIO(r.text), index_col=0)
+
+def time_table():
+    return CACHE.get("time.csv", load_time_table)
+
+def time_axis(tile, group, cube):
+    return CACHE.get((tile, group, "time"), lambda: cube.time[:])
+
+def open_group(url):
+    """zarr group at `url` whose HTTP requests time out after READ_TIMEOUT seconds and count in http_client.stats()."""
+    client_kwargs = {"timeout": aiohttp.ClientTimeout(total=READ_TIMEOUT),
+                     "trace_configs": [http_client.aiohttp_trace_config()]}
+    return zarr.open(url, mode="r", storage_options={"client_kwargs": client_kwargs})
+
+def open_groups(tile):
+    """Open the 10m, 20m and indices groups of a tile concurrently."""
     path = f"{PATH}/{tile}"
+    with DaemonPool(len(GROUPS)) as pool:
+        return dict(zip(GROUPS, pool.map(lambda group: open_group(f"{path}/{group}"), GROUPS)))
 
-    time_df = pd.read_csv(f"{PATH}/time.csv", index_col=0)
-    path_10m = f"{path}/10"
-    cube_10m = zarr.open(path_10m)
-    if t < 0:
-        t = len(cube_10m.time[:]) + t
-    T = len(cube_10m.time[:]) - 10
-    time_10 = cube_10m.time[T]
-
-    check_red_nan = False
-    check_red = False
-    if np.isnan(cube_10m.red[t, 6000, 6000]):
-        check_red_nan = np.isnan(cube_10m.red[t, :, :]).all()
-    if (cube_10m.red[t, 6000, 6000] == 0):
-        check_red = (cube_10m.red[t, :, :] == 0).all()
+PROFILE_STATS = ("nan_fraction", "zero_fraction", "valid_fraction", "min", "max", "mean", "valid_pixels")
+
+def block_profile(block, zero_valid=False):
+    """Pixel counts and value range of one block from a single NaN/zero mask.
+
+    Valid pixels are not NaN and, unless `zero_valid` is set, not 0 (no-data
+    for the L2A bands and SCL; a valid value for NDVI and LAI).
+    """
+    nan = np.isnan(block) if block.dtype.kind == "f" else np.zeros(block.shape, dtype=bool)
+    zero = block == 0
+    valid = block[~nan] if zero_valid else block[~(nan | zero)]
+    return {
+        "pixels": block.size,
+        "nan": int(nan.sum()),
+        "zero": int(zero.sum()),
+        "valid": valid.size,
+        "sum": float(valid.sum(dtype="f8")),
+        "min": float(valid.min()) if valid.size else np.inf,
+        "max": float(valid.max()) if valid.size else -np.inf,
+    }
+
+def merge_profiles(a, b):
+    merged = {key: a[key] + b[key] for key in ("pixels", "nan", "zero", "valid", "sum")}
+    merged["min"] = min(a["min"], b["min"])
+    merged["max"] = max(a["max"], b["max"])
+    return merged
+
+def quality_stats(profile):
+    """NaN/zero/valid fractions, value range, mean and valid-pixel count of a profile."""
+    valid = profile["valid"]
+    return {
+        "nan_fraction": profile["nan"] / profile["pixels"] if profile["pixels"] else float("nan"),
+        "zero_fraction": profile["zero"] / profile["pixels"] if profile["pixels"] else float("nan"),
+        "valid_fraction": valid / profile["pixels"] if profile["pixels"] else float("nan"),
+        "min": profile["min"] if valid else float("nan"),
+        "max": profile["max"] if valid else float("nan"),
+        "mean": profile["sum"] / valid if valid else float("nan"),
+        "valid_pixels": valid,
+    }
+
+def chunk_grid(arr, start=(0, 0)):
+    """Origins of the chunks of arr[t, :, :], starting with the chunk containing pixel `start`."""
+    _, ny, nx = arr.shape
+    _, cy, cx = arr.chunks
+    grid = [(y, x) for y in range(0, ny, cy) for x in range(0, nx, cx)]
+    first = (start[0] // cy * cy, start[1] // cx * cx)
+    if first in grid:
+        grid.remove(first)
+        grid.insert(0, first)
+    return grid
+
+def scan_slice(arr, t, start=(0, 0), zero=True):
+    """Walk arr[t, :, :] along the zarr chunk grid until the first chunk holding data.
+
+    The walk starts with the chunk containing pixel `start`, so peak memory
+    is bounded by one chunk and a healthy timestep usually costs a single
+    chunk read. Returns (all_nan, all_zero); all_zero is only evaluated if
+    `zero` is set.
+    """
+    _, cy, cx = arr.chunks
+    all_nan, all_zero = True, zero
+    for y, x in chunk_grid(arr, start):
+        block = arr[t, y:y + cy, x:x + cx]
+        all_nan = all_nan and block.dtype.kind == "f" and bool(np.isnan(block).all())
+        # NaN counts as nonzero for any()
+        all_zero = all_zero and not block.any()
+        if not (all_nan or all_zero):
+            break
+    return all_nan, all_zero
+
+def profile_slice(arr, t, zero_valid=False):
+    """Quality stats (see quality_stats) of the whole of arr[t, :, :], read chunk by chunk.
+
+    Peak memory is bounded by one chunk. Returns (all_nan, all_zero, stats).
+    """
+    _, cy, cx = arr.chunks
+    profile = None
+    for y, x in chunk_grid(arr):
+        block = block_profile(arr[t, y:y + cy, x:x + cx], zero_valid)
+        profile = block if profile is None else merge_profiles(profile, block)
+    return profile["nan"] == profile["pixels"], profile["zero"] == profile["pixels"], quality_stats(profile)
+
+def check_timestep(tile, groups, times, t, profiles=None):
+    """Empty-slice checks of timestep t across the 10m, 20m and indices cubes.
+
+    Without `profiles` a band is only read up to its first chunk with data.
+    With it, every band is read in full and its quality stats are written
+    to `profiles`.
+    """
+    times_10, times_20, times_ind = times["10"], times["20"], times["indices"]
+    if t > len(times_20) - 1:
+        return False, f"ERROR: {tile}: SCL < RED: {len(times_20) - 1} < {t} "
+    if t > len(times_ind) - 1:
+        return False, f"ERROR: {tile}: NDVI < RED: {len(times_ind) - 1} < {t} "
+
+    # band: (array, first chunk to scan, all-zero slices are empty, 0 is a valid value)
+    bands = {
+        "red": (groups["10"].red, CENTER_10M, True, False),
+        "scl": (groups["20"].scl, CENTER_20M, True, False),
+        "ndvi": (groups["indices"].ndvi, CENTER_10M, False, True),
+        "lai": (groups["indices"].lai, CENTER_10M, False, True),
+    }
+
+    def check_band(band):
+        arr, start, zero, zero_valid = bands[band]
+        if profiles is None:
+            return scan_slice(arr, t, start, zero)
+        all_nan, all_zero, profiles[band] = profile_slice(arr, t, zero_valid)
+        return all_nan, zero and all_zero
+
+    # the bands of the three groups are checked concurrently
+    with DaemonPool(len(bands)) as pool:
+        checked = dict(zip(bands, pool.map(check_band, bands)))
+    check_red_nan, check_red = checked["red"]
+    check_scl_nan, check_scl = checked["scl"]
+    check_ndvi, check_lai = checked["ndvi"][0], checked["lai"][0]
     if check_red or check_red_nan:
-        print(f"All NaN values: {tile}: RED at {t} {cube_10m.time[t]}")
-    if time_df.loc[tile, ["time"]].values != str(cube_10m.time[-1])[:10]:
-        return False, f"ERROR: Processing did not complete: {tile}: RED at {t} {cube_10m.time[t]} "
-
-    path_20m = f"{path}/20"
-    cube_20m = zarr.open(path_20m)
-    time_20 = cube_20m.time[T]
-    if t > len(cube_20m.time[:]) - 1:
-        return False, f"ERROR: {tile}: SCL < RED: {len(cube_20m.time[:]) - 1} < {t} "
-    check_scl_nan = False
-    check_scl = False
-    if (cube_20m.scl[t, 3000, 3000] == 0):
-        check_scl = (cube_20m.scl[t, :, :] == 0).all()
-    if np.isnan(cube_20m.scl[t, 3000, 3000]):
-        check_scl_nan = np.isnan(cube_20m.scl[t, :, :]).all()
+        print(f"All NaN values: {tile}: RED at {t} {times_10[t]}")
     if check_scl or check_scl_nan:
-        print(f"All NaN values: {tile}: SCL at {t} {cube_20m.time[t]}")
-    if time_df.loc[tile, ["time"]].values != str(cube_20m.time[-1])[:10]:
-        return False, f"ERROR: Processing did not complete: {tile}: SCL at {t} {cube_20m.time[t]} "
-
-    path_indices = f"{path}/indices"
-    indices = zarr.open(path_indices)
-    time_ind = indices.time[T]
-    check_ndvi = False
-    check_lai = False
-    if t > len(indices.time[:]) - 1:
-        return False, f"ERROR: {tile}: NDVI < RED: {len(indices.time[:]) - 1} < {t} "
-    if np.isnan(indices.ndvi[t, 6000, 6000]):
-        check_ndvi = np.isnan(indices.ndvi[t, :, :]).all()
-        if check_ndvi:
-            print(f"All NaN values: {tile}: NDVI at {t} {indices.time[t]} ")
-    if np.isnan(indices.lai[t, 6000, 6000]):
-        check_lai = np.isnan(indices.lai[t, :, :]).all()
-        if check_lai:
-            print(f"All NaN values: {tile}: LAI at {t} {indices.time[t]} ")
-    if time_df.loc[tile, ["time"]].values != str(indices.time[-1])[:10]:
-        return False, f"ERROR: Processing did not complete: {tile}: Indices at {t} {indices.time[t]} "
-
-    if str(time_ind) != str(time_10):
-        return False, f"ERROR: {tile}: Time mismatch: INDICES: {time_ind} != 10m: {time_10} "
-
-    if str(time_20) != str(time_10):
-        return False, f"ERROR: {tile}: Time mismatch: 20m: {time_20} != 10m: {time_10} "
-
-    if t == -1:
-        today = datetime.now()
-
-        latest = datetime.strptime(str(indices.time[t])[:19], "%Y-%m-%dT%H:%M:%S")
-        if today - latest > timedelta(8):
-            return False, f"ERROR: {tile}: Latest timestep: {latest}"
+        print(f"All NaN values: {tile}: SCL at {t} {times_20[t]}")
+    if check_ndvi:
+        print(f"All NaN values: {tile}: NDVI at {t} {times_ind[t]} ")
+    if check_lai:
+        print(f"All NaN values: {tile}: LAI at {t} {times_ind[t]} ")
+
     if check_red or check_red_nan and (not check_scl or not check_scl_nan):
          return False, f"ERROR: {tile}: timestep: {t}"
     if check_scl or check_scl_nan and (not check_red or not check_red_nan):
@@ -92,6 +239,271 @@ def check_tile(tile, t=-1):
          return False, f"ERROR: {tile}: timestep: {t}"
     return True, "OK"
 
+def describe(values, limit=5):
+    values = [str(v) for v in values]
+    return ", ".join(values[:limit]) + (f" ... (+{len(values) - limit})" if len(values) > limit else "")
+
+def check_time_alignment(tile, times):
+    """Compare the full time axes of the 10m, 20m and indices cubes.
+
+    Reports length mismatches, duplicate or unordered timestamps, timestamps
+    missing from one cube and the indices at which the axes diverge.
+    """
+    axes = {"10m": np.asarray(times["10"]), "20m": np.asarray(times["20"]), "indices": np.asarray(times["indices"])}
+    ref = axes["10m"]
+    issues = []
+    for group, axis in axes.items():
+        uniq, counts = np.unique(axis, return_counts=True)
+        if (counts > 1).any():
+            issues.append(f"{group}: duplicate timestamps: {describe(uniq[counts > 1])}")
+        unordered = np.flatnonzero(axis[1:] < axis[:-1]) + 1
+        if unordered.size:
+            issues.append(f"{group}: unordered at indices: {describe(unordered)}")
+        if group == "10m":
+            continue
+        if len(axis) != len(ref):
+            issues.append(f"{group}: {len(axis)} timesteps != 10m: {len(ref)}")
+        missing, extra = np.setdiff1d(ref, axis), np.setdiff1d(axis, ref)
+        if missing.size:
+            issues.append(f"{group}: missing timestamps: {describe(missing)}")
+        if extra.size:
+            issues.append(f"{group}: timestamps not in 10m: {describe(extra)}")
+        n = min(len(axis), len(ref))
+        diverging = np.flatnonzero(axis[:n] != ref[:n])
+        if diverging.size:
+            issues.append(f"{group}: diverges from 10m at indices: {describe(diverging)}")
+    if issues:
+        return False, f"ERROR: {tile}: Time mismatch: " + "; ".join(issues) + " "
+    return True, "OK"
+
+def resume_index(since, times):
+    """First timestep after the checkpoint; 0 if the checkpoint no longer matches the time axes."""
+    start = len(times["10"])
+    for group in GROUPS:
+        index, stamp = since.get(group, (-1, None))
+        if index >= len(times[group]) or (index >= 0 and str(times[group][index]) != stamp):
+            print(f"Checkpoint {group}@{index} does not match the time axis, re-verifying from 0")
+            return 0
+        start = min(start, index + 1)
+    return start
+
+def check_tile(tile, t=-1, since=None, report=None):
+    """Check a tile up to timestep t.
+
+    Without `since` only timestep t is checked. With a checkpoint
+    {group: [index, time]} every timestep after it is checked in a single pass;
+    `since={}` checks the full history. The last verified index and time per
+    group are written to report["progress"] after every timestep. A failed
+    timestep before t is added to report["failed"] as [index, time] and
+    passed over, so the checkpoint still moves past it; a failed timestep t
+    is checked again on the next run. With "profile" in S2_CHECKS,
+    timestep t is read in full and its quality stats per band are written
+    to report["profiles"].
+    """
+    report = {} if report is None else report
+    with phase("open"):
+        time_df = time_table()
+        groups = open_groups(tile)
+        times = {group: time_axis(tile, group, cube) for group, cube in groups.items()}
+    times_10, times_20, times_ind = times["10"], times["20"], times["indices"]
+    if t < 0:
+        t = len(times_10) + t
+    if time_df.loc[tile, ["time"]].values != str(times_10[-1])[:10]:
+        return False, f"ERROR: Processing did not complete: {tile}: RED at {t} {times_10[t]} "
+
+    if t > len(times_20) - 1:
+        return False, f"ERROR: {tile}: SCL < RED: {len(times_20) - 1} < {t} "
+    if time_df.loc[tile, ["time"]].values != str(times_20[-1])[:10]:
+        return False, f"ERROR: Processing did not complete: {tile}: SCL at {t} {times_20[t]} "
+
+    if t > len(times_ind) - 1:
+        return False, f"ERROR: {tile}: NDVI < RED: {len(times_ind) - 1} < {t} "
+    if time_df.loc[tile, ["time"]].values != str(times_ind[-1])[:10]:
+        return False, f"ERROR: Processing did not complete: {tile}: Indices at {t} {times_ind[t]} "
+
+    aligned, msg = check_time_alignment(tile, times)
+    if not aligned:
+        return aligned, msg
+
+    start = t if since is None else resume_index(since, times)
+    failed = []
+    for ts in range(start, t + 1):
+        with phase("timestep"):
+            profiles = {} if ts == t and "profile" in CHECKS else None
+            check, msg = check_timestep(tile, groups, times, ts, profiles)
+        # report entries are replaced, not changed in place: check_tiles reads them while a timed-out tile runs on
+        if profiles is not None:
+            report["profiles"] = profiles
+        if not check:
+            failed.append(msg)
+            if ts == t:
+                break
+            report["failed"] = report.get("failed", []) + [[ts, str(times_10[ts])]]
+        report["progress"] = {group: [ts, str(times[group][ts])] for group in GROUPS}
+    if failed:
+        return False, failed[0] + (f" (+{len(failed) - 1} more failed timesteps)" if len(failed) > 1 else "")
+    return True, "OK"
+
+def load_checkpoints(path=CHECKPOINTS):
+    """{tile: {group: [last verified index, time], "failed": [times]}} from the checkpoint file."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_checkpoints(checkpoints, path=CHECKPOINTS):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(checkpoints, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+def check_inventory(tile, t=-1, report=None):
+    """Check that no chunk of timestep t went missing, using only .zmetadata and HEAD requests.
+
+    Absent chunks can be no-data, see chunk_inventory; only chunks the
+    previous timestep had fail the check. The number of absent chunks per
+    band is written to report["absent_chunks"].
+    """
+    report = {} if report is None else report
+    absent, missing = {}, {}
+    for group in GROUPS:
+        for var, found in chunk_inventory(f"{PATH}/{tile}/{group}", t=t, session=SESSION).items():
+            absent[var] = len(found["absent"])
+            if found["missing"]:
+                missing[f"{group}/{var}"] = found["missing"]
+    report["absent_chunks"] = absent
+    if missing:
+        summary = ", ".join(f"{var} ({len(keys)}: {' '.join(keys[:3])}{' ...' if len(keys) > 3 else ''})"
+                            for var, keys in missing.items())
+        return False, f"ERROR: {tile}: Missing chunks at {t}: {summary}"
+    return True, "OK"
+
+def verify_tile(tile, t=-1, since=None, report=None):
+    """Run the checks selected in S2_CHECKS; the inventory runs before any pixel is read.
+
+    Returns (ok, msg, report), see check_tile for `since` and `report`.
+    """
+    report = {} if report is None else report
+    if "inventory" in CHECKS:
+        with phase("inventory"):
+            check, msg = check_inventory(tile, t, report)
+        if not check:
+            return check, msg, report
+    if "pixels" in CHECKS:
+        with phase("pixels"):
+            return (*check_tile(tile, t, since, report), report)
+    return True, "OK", report
+
+def check_tiles(tiles, t=-1, checkpoints=None, max_workers=MAX_WORKERS, timeout=TILE_TIMEOUT):
+    """Run verify_tile for all tiles on a bounded thread pool.
+
+    Tiles with an entry in `checkpoints` are verified incrementally.
+    A tile that has been running for longer than `timeout` seconds is reported
+    as failed, with the progress it made so far, so a long backfill still
+    moves its checkpoint forward. Its worker is a daemon thread that is
+    abandoned, so it does not hold up the exit of the process; every zarr
+    read times out after READ_TIMEOUT seconds in any case.
+    Returns {tile: (ok, msg, report)} in the order of `tiles`.
+    """
+    started = {}
+    checkpoints = checkpoints or {}
+    reports = {tile: {} for tile in tiles}
+
+    def run(tile):
+        started[tile] = time.monotonic()
+        with phase("tile", tile=tile):
+            return verify_tile(tile, t, checkpoints.get(tile, {} if BACKFILL else None), reports[tile])
+
+    results = {}
+    pool = DaemonPool(max_workers)
+    futures = {pool.submit(run, tile): tile for tile in tiles}
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, timeout=1, return_when=FIRST_COMPLETED)
+        for fut in done:
+            tile = futures[fut]
+            try:
+                results[tile] = fut.result()
+            except Exception as e:
+                results[tile] = (False, f"ERROR: {tile}: Exception: {e}", reports[tile])
+        now = time.monotonic()
+        for fut in list(pending):
+            tile = futures[fut]
+            if tile in started and now - started[tile] > timeout:
+                results[tile] = (False, f"ERROR: {tile}: Timeout after {timeout:.0f}s", dict(reports[tile]))
+                pending.discard(fut)
+    pool.shutdown(cancel_futures=True)
+    return {tile: results[tile] for tile in tiles}
+
+def dask_client():
+    """Client on an EODC Dask Gateway cluster, or on a LocalCluster if no gateway is available."""
+    from dask.distributed import Client, LocalCluster
+    user, pwd = os.getenv("EODC_USERNAME"), os.getenv("EODC_PASSWORD")
+    if user and pwd:
+        try:
+            from unittest.mock import patch
+            from test_dask import CustomEODCDaskGateway
+            with patch("getpass.getpass", return_value=pwd):
+                gateway = CustomEODCDaskGateway(username=user, password=pwd)
+                cluster = gateway.new_cluster()
+            cluster.scale(DASK_WORKERS)
+            return Client(cluster), cluster
+        except ImportError as e:
+            print(f"Dask Gateway needs the eodc package (pip install eodc), using LocalCluster: {e}")
+        except Exception as e:
+            print(f"Dask Gateway not available, using LocalCluster: {e}")
+    cluster = LocalCluster(n_workers=DASK_WORKERS, threads_per_worker=1)
+    return Client(cluster), cluster
+
+def upload_helpers(client):
+    """Make the e2e_helpers package importable on the workers."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = os.path.join(tmp, "e2e_helpers.zip")
+        with zipfile.ZipFile(archive, "w") as zf:
+            for name in os.listdir(os.path.join(root, "e2e_helpers")):
+                if name.endswith(".py"):
+                    zf.write(os.path.join(root, "e2e_helpers", name), f"e2e_helpers/{name}")
+        client.upload_file(archive)
+
+def check_tiles_dask(tiles, t=-1, checkpoints=None, timeout=TILE_TIMEOUT):
+    """Run verify_tile for all tiles as futures on a Dask cluster.
+
+    Same contract as check_tiles. Tiles are spread over the workers, so the
+    time budget is `timeout` per round of tiles; unfinished tiles are
+    cancelled and reported as timed out.
+    """
+    from dask.distributed import wait as dask_wait
+
+    checkpoints = checkpoints or {}
+    client, cluster = dask_client()
+    futures = []
+    results = {}
+    try:
+        upload_helpers(client)
+        client.wait_for_workers(1, timeout=timeout)
+        slots = max(1, sum(client.nthreads().values()))
+        sinces = [checkpoints.get(tile, {} if BACKFILL else None) for tile in tiles]
+        futures = client.map(verify_tile, tiles, [t] * len(tiles), sinces, pure=False)
+        dask_wait(futures, timeout=timeout * math.ceil(len(tiles) / slots))
+    except TimeoutError as e:
+        print(f"Dask: {e}")
+    try:
+        for tile, fut in zip(tiles, futures):
+            if fut.status == "finished":
+                results[tile] = fut.result()
+            elif fut.status == "error":
+                results[tile] = (False, f"ERROR: {tile}: Exception: {fut.exception()}", {})
+            else:
+                fut.cancel()
+    finally:
+        client.close()
+        cluster.close()
+    for tile in tiles:
+        results.setdefault(tile, (False, f"ERROR: {tile}: Timeout after {timeout:.0f}s", {}))
+    return {tile: results[tile] for tile in tiles}
+
 def ok(resp):
     if not (200 <= resp.status_code < 300):
         return False, f"HTTP {resp.status_code}"
@@ -104,18 +516,38 @@ def main():
     try:
         msg = ""
         success = True
-        r = requests.get(f"{PATH}/T33UWP/indices/.zmetadata", timeout=15)
+        results = {}
+        gauges = []
+        with phase("zmetadata"):
+            r = SESSION.get(f"{PATH}/T33UWP/indices/.zmetadata", timeout=15)
         okc, msgc = ok(r)
         if not okc:
             success, msg = False, f"Check hda: {PATH}/T33UWP/indices/.zmetadata {msgc}"
         else:
-            today = datetime.now()
             t = -1
-            for tile in tiles:
-                check, msgc = check_tile(tile, t)
+            checkpoints = load_checkpoints()
+            with phase("check_tiles", executor=EXECUTOR):
+                if EXECUTOR == "dask":
+                    results = check_tiles_dask(tiles, t, checkpoints)
+                else:
+                    results = check_tiles(tiles, t, checkpoints)
+            for tile, (check, msgc, report) in results.items():
                 if not check:
                     success = False
                     msg += msgc + "\n"
+                if report.get("progress"):
+                    checkpoints.setdefault(tile, {}).update(report["progress"])
+                if report.get("failed"):
+                    failed = checkpoints[tile].setdefault("failed", [])
+                    failed += [stamp for _, stamp in report["failed"] if stamp not in failed]
+                gauges += [("eodc_e2e_s2_absent_chunks", absent, {"tile": tile, "band": band})
+                           for band, absent in report.get("absent_chunks", {}).items()]
+                for band, stats in report.get("profiles", {}).items():
+                    gauges += [(f"eodc_e2e_s2_{stat}", stats[stat], {"tile": tile, "band": band})
+                               for stat in PROFILE_STATS if not np.isnan(stats[stat])]
+            save_checkpoints(checkpoints)
+            passed = sum(check for check, _, _ in results.values())
+            msg += f"{passed}/{len(results)} tiles OK"
 
     except Exception as e:
         success, msg = False, f"Exception: {e}"
@@ -123,10 +555,18 @@ def main():
     ts = datetime.now().strftime("%Y-%m-%d %H:%M")
     line = f"{ts} - {'SUCCESS' if success else 'FAILURE:'} {msg}"
     print(line)
+    # with dask the reads are cached on the workers, this process has no stats
+    if EXECUTOR != "dask":
+        print(CACHE.stats())
+    for tile, (check, msgc, _) in results.items():
+        store.record(service, "SUCCESS" if check else "FAILURE", target=tile, message=msgc)
+    store.record(service, "SUCCESS" if success else "FAILURE", message=msg, duration=time.time() - t0)
 
-    push_e2e_result(service, success, time.time() - t0)
+    push_e2e_result(service, success, time.time() - t0,
+                    targets={tile: check for tile, (check, _, _) in results.items()}, gauges=gauges)
     if not success:
         raise SystemExit(1)
 
 if __name__ == "__main__":
-    main()
+    with probe(SERVICE):
+        main()
@@ -1,13 +1,16 @@
 #!/usr/bin/env python3
-import os, sys, time, requests
+import os, sys, time
 from datetime import datetime, timedelta
 from pystac_client import Client
 import zarr
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from e2e_helpers import http_client, store
+from e2e_helpers.phases import phase
 from e2e_helpers.prom import push_e2e_result
+from e2e_helpers.trace import probe
 
 LOG = "results/logs/test_s2_datacube.log"
-SERVICE = "s2-datacube"
+SERVICE = "s2-stac"
 PATH = "https://data.eodc.eu/collections/S2-L2A-C1"
 
 tiles = ['T32TNS', 'T32TNT', 'T32TPS', 'T32TPT', 'T32TQS', 'T32TQT', 'T32UQU', 
@@ -15,6 +18,7 @@ tiles = ['T32TNS', 'T32TNT', 'T32TPS', 'T32TPT', 'T32TQS', 'T32TQT', 'T32UQU',
          'T33UUP', 'T33UVP', 'T33UVQ', 'T33UWP', 'T33UWQ', 'T33UXP', 'T33UXQ',        
         ]
 
+@phase("stac_search")
 def check_stac():
     bbox = [9.684, 46.072, 17.181, 49.205]
     te = datetime.now()
@@ -80,7 +84,8 @@ def main():
     try:
         msg = ""
         success = True
-        r = requests.get(f"{PATH}/T33UWP/indices/.zmetadata", timeout=15)
+        with phase("zmetadata"):
+            r = http_client.get(f"{PATH}/T33UWP/indices/.zmetadata", timeout=15)
         okc, msgc = ok(r)
         if not okc:
             success, msg = False, f"Check hda: {PATH}/T33UWP/indices/.zmetadata {msgc}"
@@ -95,8 +100,10 @@ def main():
     ts = datetime.now().strftime("%Y-%m-%d %H:%M")
     line = f"{ts} - {'SUCCESS' if success else 'FAILURE:'} {msg}"
     print(line)
+    store.record(service, "SUCCESS" if success else "FAILURE", message=msg, duration=time.time() - t0)
 
     push_e2e_result(service, success, time.time() - t0)
 
 if __name__ == "__main__":
-    main()
+    with probe(SERVICE):
+        main()
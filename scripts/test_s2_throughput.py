@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+import os, sys, json, time, random, asyncio
+from datetime import datetime
+import aiohttp
+import numpy as np
+from fsspec.implementations.http import HTTPFileSystem
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from e2e_helpers import http_client, store
+from e2e_helpers.phases import phase
+from e2e_helpers.prom import push_e2e_result
+from e2e_helpers.trace import probe
+from e2e_helpers.zmeta import expected_chunk_keys, time_variables
+from test_s2_datacube import PATH, GROUPS, tiles
+
+# reported apart from the datacube health check
+SERVICE = "s2-throughput"
+LEVELS = [int(level) for level in os.environ.get("S2_BENCH_LEVELS", "1,4,16,64").split(",")]
+SAMPLE = int(os.environ.get("S2_BENCH_SAMPLE", "64"))
+SAMPLE_TILES = int(os.environ.get("S2_BENCH_TILES", "3"))
+STATS = ("chunks_per_second", "mb_per_second", "latency_p50_seconds", "latency_p95_seconds", "latency_p99_seconds",
+         "absent_chunks")
+
+async def get_client(**kwargs):
+    # one keep-alive pool sized for the highest concurrency level
+    connector = aiohttp.TCPConnector(limit=max(LEVELS), ttl_dns_cache=300)
+    return aiohttp.ClientSession(connector=connector, trace_configs=[http_client.aiohttp_trace_config()], **kwargs)
+
+async def chunk_urls(fs, bench_tiles):
+    """All chunk URLs of a random timestep per time-indexed variable of each tile and group.
+
+    The URLs come from the array shapes, so they include no-data chunks
+    that are not stored, see zmeta.chunk_inventory.
+    """
+    urls = []
+    for tile in bench_tiles:
+        for group in GROUPS:
+            url = f"{PATH}/{tile}/{group}"
+            metadata = json.loads(await fs._cat_file(f"{url}/.zmetadata"))["metadata"]
+            for name in time_variables(metadata):
+                t = random.randrange(metadata[f"{name}/.zarray"]["shape"][0])
+                urls += [f"{url}/{key}" for key in expected_chunk_keys(metadata, name, t)]
+    return urls
+
+async def read_level(fs, urls, level):
+    """Read urls with at most `level` requests in flight; returns (latencies, bytes, errors, absent, elapsed).
+
+    A 404 is a no-data chunk, not an error: it is counted in `absent` and
+    left out of the latencies.
+    """
+    semaphore = asyncio.Semaphore(level)
+    latencies, errors = [], []
+    absent = 0
+
+    async def read(url):
+        nonlocal absent
+        async with semaphore:
+            t = time.perf_counter()
+            try:
+                data = await fs._cat_file(url)
+            except FileNotFoundError:
+                absent += 1
+                return 0
+            except Exception as e:
+                errors.append(f"{url}: {e}")
+                return 0
+            latencies.append(time.perf_counter() - t)
+            return len(data)
+
+    t = time.perf_counter()
+    sizes = await asyncio.gather(*(read(url) for url in urls))
+    return latencies, sum(sizes), errors, absent, time.perf_counter() - t
+
+async def sweep(levels=LEVELS, sample=SAMPLE, sample_tiles=SAMPLE_TILES):
+    """Read a fresh random sample of chunks at every concurrency level.
+
+    Returns ({level: stats}, errors).
+    """
+    fs = HTTPFileSystem(asynchronous=True, get_client=get_client)
+    session = await fs.set_session()
+    try:
+        with phase("chunk_urls"):
+            urls = await chunk_urls(fs, random.sample(tiles, min(sample_tiles, len(tiles))))
+        results, errors = {}, []
+        for level in levels:
+            # phases are not opened inside the concurrent reads, they share this thread's phase stack
+            with phase("read", concurrency=level):
+                latencies, nbytes, level_errors, absent, elapsed = await read_level(fs, random.sample(urls, min(sample, len(urls))), level)
+            errors += level_errors
+            if not latencies:
+                continue
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            results[level] = {
+                "chunks_per_second": len(latencies) / elapsed,
+                "mb_per_second": nbytes / elapsed / 1e6,
+                "latency_p50_seconds": p50,
+                "latency_p95_seconds": p95,
+                "latency_p99_seconds": p99,
+                "absent_chunks": absent,
+            }
+        return results, errors
+    finally:
+        await session.close()
+
+def main():
+    t0 = time.time()
+    results = {}
+    try:
+        results, errors = asyncio.run(sweep())
+        success = bool(results) and not errors
+        msg = "\n".join(errors[:10])
+        for level, stats in results.items():
+            print(f"concurrency={level:3d} " + " ".join(f"{stat}={stats[stat]:.3f}" for stat in STATS))
+    except Exception as e:
+        success, msg = False, f"Exception: {e}"
+
+    ts = datetime.now().strftime("%Y-%m-%d %H:%M")
+    print(f"{ts} - {'SUCCESS' if success else 'FAILURE:'} {msg}")
+    store.record(SERVICE, "SUCCESS" if success else "FAILURE", message=msg, duration=time.time() - t0,
+                 extra={str(level): stats for level, stats in results.items()})
+
+    push_e2e_result(SERVICE, success, time.time() - t0,
+                    gauges=[(f"eodc_e2e_s2_read_{stat}", stats[stat], {"concurrency": str(level)})
+                            for level, stats in results.items() for stat in STATS])
+    if not success:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    with probe(SERVICE):
+        main()
@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
-import os, sys, time, random, requests
+import os, sys, time, random
 from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from e2e_helpers import http_client, store
+from e2e_helpers.phases import phase
+from e2e_helpers.segments import SegmentedLog
 from e2e_helpers.prom import push_e2e_result
+from e2e_helpers.trace import probe
 
 STAC_URL = os.environ.get("STAC_URL", "https://stac.eodc.eu/api/v1")
 LOG = "results/logs/test_stac_api.log"
@@ -22,12 +26,14 @@ def ok(resp, expect_json=True):
     return True, "OK"
 
 def main():
-    os.makedirs(os.path.dirname(LOG), exist_ok=True)
     t0 = time.time()
     service = SERVICE
+    timings = {}
 
     try:
-        r = requests.get(f"{STAC_URL}/collections", timeout=15)
+        with phase("collections"):
+            r = http_client.get(f"{STAC_URL}/collections", timeout=15)
+        timings = r.timings
         okc, msgc = ok(r)
         if not okc:
             success, msg, col_id = False, f"/collections {msgc}", "N/A"
@@ -40,7 +46,8 @@ def main():
                 if col_id == "N/A":
                     success, msg = True, "no collection id (200, OK JSON)"
                 else:
-                    r2 = requests.get(f"{STAC_URL}/collections/{col_id}", timeout=15)
+                    with phase("collection"):
+                        r2 = http_client.get(f"{STAC_URL}/collections/{col_id}", timeout=15)
                     ok2, msg2 = ok(r2)
                     success, msg = (True, "collection OK (200, JSON)") if ok2 else (False, f"/collections/{col_id} {msg2}")
     except Exception as e:
@@ -48,12 +55,17 @@ def main():
 
     ts = datetime.now().strftime("%Y-%m-%d %H:%M")
     line = f"{ts}, {'SUCCESS' if success else 'FAILURE'}, collection: {col_id}, item: N/A, reason: {msg}"
-    with open(LOG, "a", encoding="utf-8") as f:
-        f.write(line + "\n")
+    SegmentedLog(LOG).append(line)
+    store.record(service, "SUCCESS" if success else "FAILURE", target=None if col_id == "N/A" else col_id,
+                 message=msg, duration=time.time() - t0)
 
-    push_e2e_result(service, success, time.time() - t0)
+    push_e2e_result(service, success, time.time() - t0,
+                    gauges=[(f"eodc_e2e_http_{name}_seconds", timings[name], {"endpoint": "/collections"})
+                            for name in http_client.PHASES if name in timings],
+                    dims={"collection": col_id} if col_id != "N/A" else None)
     if not success:
         raise SystemExit(1)
 
 if __name__ == "__main__":
-    main()
+    with probe(SERVICE):
+        main()
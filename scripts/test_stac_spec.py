@@ -1,14 +1,22 @@
-import requests
 import json
 import os
+import sys
 from jsonschema import validate, ValidationError
 from datetime import datetime
 from jinja2 import Template
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from e2e_helpers import http_client, store
+from e2e_helpers.phases import phase
+from e2e_helpers.prom import push_phases
+from e2e_helpers.trace import start_probe
 
 # Konfiguration
 API_URL = "https://dev.stac.eodc.eu/api/v1"
 HISTORY_FILE = "stac_validation_log_history.json"
 HTML_FILE = "docs/stac_report.html"
+SERVICE = "stac-spec"
+
+start_probe(SERVICE)
 
 COLLECTION_SCHEMA_URL = "https://schemas.stacspec.org/v1.0.0/collection-spec/json-schema/collection.json"
 ITEM_SCHEMA_URL = "https://schemas.stacspec.org/v1.0.0/item-spec/json-schema/item.json"
@@ -58,8 +66,9 @@ TEMPLATE_HTML = """
 </html>
 """
 
+@phase("load_schema")
 def load_schema(url):
-    r = requests.get(url)
+    r = http_client.get(url)
     r.raise_for_status()
     return r.json()
 
@@ -78,8 +87,9 @@ collection_schema = load_schema(COLLECTION_SCHEMA_URL)
 item_schema = load_schema(ITEM_SCHEMA_URL)
 
 
-collections_resp = requests.get(f"{API_URL}/collections")
-collections_resp.raise_for_status()
+with phase("collections"):
+    collections_resp = http_client.get(f"{API_URL}/collections")
+    collections_resp.raise_for_status()
 collections = collections_resp.json().get("collections", [])
 
 if not collections:
@@ -101,8 +111,9 @@ for col in collections:
 
     items_url = f"{API_URL}/collections/{col_id}/items"
     try:
-        items_resp = requests.get(items_url)
-        items_resp.raise_for_status()
+        with phase("items"):
+            items_resp = http_client.get(items_url)
+            items_resp.raise_for_status()
         items = items_resp.json().get("features", [])
         if items:
             item = items[0]
@@ -115,6 +126,10 @@ for col in collections:
         item_id = "-"
         item_val = f"error: {str(e)}"
 
+    valid = col_val == "success" and item_val in ("success", "no items")
+    store.record(SERVICE, "SUCCESS" if valid else "FAILURE", target=col_id,
+                 message=f"collection: {col_val}; item {item_id}: {item_val}")
+
     # Neue Version speichern
     history_dict[col_id] = {
         "timestamp": datetime.utcnow().isoformat(),
@@ -140,5 +155,6 @@ with open(HTML_FILE, "w") as f:
 
 print(f"{len(final_history)} Collections checked")
 print(f"Report saved in: {HTML_FILE}")
+push_phases(SERVICE)
 
 
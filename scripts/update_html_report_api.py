@@ -1,5 +1,13 @@
 import os
+import sys
+import sqlite3
 from datetime import datetime
+from html import escape
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from e2e_helpers import store
+from e2e_helpers.rollup import WINDOWS
+from e2e_helpers.report import Template, write_pages
+from e2e_helpers.segments import SegmentedLog
 
 LOG_FILE = "results/logs/test_stac_api.log"
 HTML_FILE = "docs/index.html"
@@ -8,44 +16,49 @@ def parse_logs(log_file):
     """Parse the log file and return a dictionary of collections with their statuses."""
     collections_status = {}
 
-    if not os.path.exists(log_file):
+    log = SegmentedLog(log_file)
+    if not os.path.exists(log_file) and not os.path.isdir(log.directory):
         print(f"Log file not found: {log_file}")
         return collections_status
 
-    with open(log_file, "r") as file:
-        for line in file:
-            parts = line.strip().split(", ")
-            if len(parts) < 3:
-                continue
+    for line in log.read():
+        parts = line.strip().split(", ")
+        if len(parts) < 3:
+            continue
 
-            timestamp = parts[0]
-            status = parts[1]
-            collection_info = [p.split(": ")[1] for p in parts if p.startswith("collection")]
-            collection_id = collection_info[0] if collection_info else "Unknown"
+        timestamp = parts[0]
+        status = parts[1]
+        collection_info = [p.split(": ")[1] for p in parts if p.startswith("collection")]
+        collection_id = collection_info[0] if collection_info else "Unknown"
 
-            # Update or add collection status
-            collections_status[collection_id] = {
-                "status": status,
-                "last_tested": timestamp
-            }
+        # Update or add collection status
+        collections_status[collection_id] = {
+            "status": status,
+            "last_tested": timestamp
+        }
 
     return collections_status
 
-def generate_html(collections_status, html_file):
-    """Generate an HTML file displaying the collections and their statuses."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    logo_path = "eodc_logo_2025.png"  # Adjust the path if necessary
+def read_store(service="stac"):
+    """Latest status per collection from the result store, same shape as parse_logs."""
+    return {
+        r.target: {"status": r.status, "last_tested": datetime.fromtimestamp(r.ts).strftime("%Y-%m-%d %H:%M")}
+        for r in store.latest_per_target(service)
+    }
 
-    # Count statuses for summary
-    summary = {"SUCCESS": 0, "FAILURE": 0}
-    for data in collections_status.values():
-        summary[data["status"].upper()] = summary.get(data["status"].upper(), 0) + 1
+def from_status(entry):
+    """Collections and availability from the "STAC API" entry of status_data.json."""
+    collections_status = {
+        c["collection"]: {"status": c["status"], "last_tested": c["timestamp"]}
+        for c in (entry["extra_info"] or [])
+    }
+    return collections_status, entry.get("rollup")
 
-    total = len(collections_status)
-    success_percentage = (summary["SUCCESS"] / total) * 100 if total else 0
-    failure_percentage = (summary["FAILURE"] / total) * 100 if total else 0
+def read_availability(service="stac"):
+    """{window: summary} for 24h, 7d and 30d from the result store rollups."""
+    return {window: store.summary(service, window) for window in WINDOWS}
 
-    html_content = f"""
+HEAD = Template("""
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -119,6 +132,9 @@ def generate_html(collections_status, html_file):
                 color: red;
                 font-weight: bold;
             }}
+            .pages {{
+                margin-top: 20px;
+            }}
             footer {{
                 text-align: center;
                 margin-top: 20px;
@@ -137,14 +153,16 @@ def generate_html(collections_status, html_file):
                 <div class="chartBar">
                     <div class="barLabel">Success</div>
                     <div class="bar success" style="width: {success_percentage}%;"></div>
-                    <span>{summary['SUCCESS']} ({success_percentage:.1f}%)</span>
+                    <span>{success} ({success_percentage:.1f}%)</span>
                 </div>
                 <div class="chartBar">
                     <div class="barLabel">Failure</div>
                     <div class="bar failure" style="width: {failure_percentage}%;"></div>
-                    <span>{summary['FAILURE']} ({failure_percentage:.1f}%)</span>
+                    <span>{failure} ({failure_percentage:.1f}%)</span>
                 </div>
             </div>
+            {nav}
+            <div class="availability">{availability}</div>
             <table>
                 <thead>
                     <tr>
@@ -154,40 +172,90 @@ def generate_html(collections_status, html_file):
                     </tr>
                 </thead>
                 <tbody>
-    """
+""")
 
-    for collection, data in collections_status.items():
-        status_class = "success" if data["status"].lower() == "success" else "failure"
-        html_content += f"""
+ROW = Template("""
         <tr>
             <td>{collection}</td>
-            <td class="{status_class}">{data['status']}</td>
-            <td>{data['last_tested']}</td>
+            <td class="{status_class}">{status}</td>
+            <td>{last_tested}</td>
         </tr>
-        """
+        """)
 
-    html_content += f"""
+TAIL = Template("""
                 </tbody>
             </table>
+            {nav}
             <footer>
                 Generated on {timestamp}.
             </footer>
         </div>
     </body>
     </html>
-    """
+    """)
 
-    with open(html_file, "w") as file:
-        file.write(html_content)
+def rows(collections_status):
+    """Template fields of one table row per collection."""
+    for collection, data in collections_status.items():
+        yield {
+            "collection": escape(collection),
+            "status_class": "success" if data["status"].lower() == "success" else "failure",
+            "status": escape(data["status"]),
+            "last_tested": escape(data["last_tested"]),
+        }
+
+def generate_html(collections_status, html_file, availability=None):
+    """Generate HTML pages displaying the collections and their statuses."""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    # rollup windows start at a full hour or day, see rollup.summary
+    availability_line = " | ".join(
+        f"{window}"
+        + (f" (since {datetime.fromtimestamp(summary['since']):%Y-%m-%d %H:%M})" if summary.get("since") else "")
+        + f": {summary['availability'] * 100:.1f}%"
+        + (f" (p95 {summary['p95_duration']:.2f}s)" if summary["p95_duration"] is not None else "")
+        for window, summary in (availability or {}).items() if summary["availability"] is not None
+    )
+    logo_path = "eodc_logo_2025.png"  # Adjust the path if necessary
+
+    # Count statuses for summary
+    summary = {"SUCCESS": 0, "FAILURE": 0}
+    for data in collections_status.values():
+        summary[data["status"].upper()] = summary.get(data["status"].upper(), 0) + 1
+
+    total = len(collections_status)
+    success_percentage = (summary["SUCCESS"] / total) * 100 if total else 0
+    failure_percentage = (summary["FAILURE"] / total) * 100 if total else 0
+
+    fields = {
+        "logo_path": logo_path,
+        "success": summary["SUCCESS"],
+        "failure": summary["FAILURE"],
+        "success_percentage": success_percentage,
+        "failure_percentage": failure_percentage,
+        "availability": f"Availability {availability_line}" if availability_line else "",
+        "timestamp": timestamp,
+    }
+    return write_pages(html_file, HEAD, ROW, TAIL, rows(collections_status), total, fields)
 
 def main():
-    collections_status = parse_logs(LOG_FILE)
+    try:
+        collections_status = read_store()
+    except sqlite3.Error as e:
+        print(f"Result store not readable: {e}")
+        collections_status = {}
+    if not collections_status:
+        collections_status = parse_logs(LOG_FILE)
     if not collections_status:
         print("No collections data found. Exiting.")
         return
 
-    generate_html(collections_status, HTML_FILE)
-    print(f"HTML report generated: {HTML_FILE}")
+    try:
+        availability = read_availability()
+    except sqlite3.Error as e:
+        print(f"Rollups not readable: {e}")
+        availability = None
+    pages = generate_html(collections_status, HTML_FILE, availability)
+    print(f"HTML report generated: {HTML_FILE} ({pages} page{'s' if pages > 1 else ''})")
 
 if __name__ == "__main__":
     main()
@@ -1,5 +1,11 @@
 import os
+import sys
+import sqlite3
 from datetime import datetime
+from html import escape
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from e2e_helpers import store
+from e2e_helpers.report import Template, write_pages
 
 LOG_FILE = "results/logs/test_notebooks.log"
 HTML_FILE = "docs/index_notebook.html"
@@ -42,21 +48,19 @@ def parse_logs(log_file):
 
     return notebook_status
 
-def generate_html(notebook_status, html_file):
-    """Generate an HTML report displaying the notebook statuses."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    # Count statuses for summary
-    summary = {"SUCCESS": 0, "FAILURE": 0, "SKIPPED": 0}
-    for notebook in notebook_status:
-        summary[notebook["status"]] = summary.get(notebook["status"], 0) + 1
-
-    total = len(notebook_status)
-    success_count = summary["SUCCESS"] + summary["SKIPPED"]  # Include SKIPPED as success
-    success_percentage = (success_count / total) * 100 if total else 0
-    failure_percentage = (summary["FAILURE"] / total) * 100 if total else 0
+def read_store(service="notebooks"):
+    """Notebook statuses of the last run from the result store, same shape as parse_logs."""
+    return [
+        {
+            "timestamp": datetime.fromtimestamp(r.ts).strftime("%Y-%m-%d %H:%M:%S"),
+            "status": r.status,
+            "notebook": r.target,
+            "error": r.message or None,
+        }
+        for r in store.last_run(service)
+    ]
 
-    html_content = f"""
+HEAD = Template("""
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -145,6 +149,9 @@ def generate_html(notebook_status, html_file):
                 font-size: 14px;
                 color: #555;
             }}
+            .pages {{
+                margin-top: 20px;
+            }}
             footer {{
                 text-align: center;
                 margin-top: 20px;
@@ -163,53 +170,101 @@ def generate_html(notebook_status, html_file):
                 <div class="chartBar">
                     <div class="barLabel">Success</div>
                     <div class="bar success"></div>
-                    <span>{summary['SUCCESS']} ({success_percentage:.1f}%)</span>
+                    <span>{success} ({success_percentage:.1f}%)</span>
                 </div>
                 <div class="chartBar">
                     <div class="barLabel">Failure</div>
                     <div class="bar failure"></div>
-                    <span>{summary['FAILURE']} ({failure_percentage:.1f}%)</span>
+                    <span>{failure} ({failure_percentage:.1f}%)</span>
                 </div>
             </div>
+            {nav}
             <div id="reports" class="reportContainer">
-    """
+""")
 
-    for notebook in notebook_status:
-        status_class = "success" if notebook["status"] in {"SUCCESS", "SKIPPED"} else "failure"
-        error_message = notebook["error"] or "N/A"
-        html_content += f"""
+ROW = Template("""
             <div class="statusContainer">
                 <div class="statusHeader">
-                    <h6 class="statusTitle">{notebook['notebook']}</h6>
-                    <div class="{status_class} statusHeadline">{notebook['status']}</div>
+                    <h6 class="statusTitle">{notebook}</h6>
+                    <div class="{status_class} statusHeadline">{status}</div>
                 </div>
                 <div class="statusSubtitle">
-                    <div><strong>Timestamp:</strong> {notebook['timestamp']}</div>
-                    <div><strong>Error:</strong> {error_message}</div>
+                    <div><strong>Timestamp:</strong> {timestamp}</div>
+                    <div><strong>Error:</strong> {error}</div>
                 </div>
             </div>
-        """
+        """)
 
-    html_content += f"""
+TAIL = Template("""
             </div>
+            {nav}
             <footer>
                 Generated on {timestamp}.
             </footer>
         </div>
     </body>
     </html>
-    """
+    """)
+
+def rows(notebook_status):
+    """Template fields of one status box per notebook."""
+    for notebook in notebook_status:
+        yield {
+            "notebook": escape(notebook["notebook"]),
+            "status_class": "success" if notebook["status"] in {"SUCCESS", "SKIPPED"} else "failure",
+            "status": escape(notebook["status"]),
+            "timestamp": escape(notebook["timestamp"]),
+            "error": escape(notebook["error"] or "N/A"),
+        }
+
+def from_status(entry):
+    """Notebook statuses from the "Notebooks" entry of status_data.json, same shape as parse_logs."""
+    return [
+        {
+            "timestamp": n.get("timestamp") or entry["timestamp"],
+            "status": n["status"],
+            "notebook": n["notebook"],
+            "error": n["message"] or None,
+        }
+        for n in (entry["extra_info"] or [])
+    ]
+
+def generate_html(notebook_status, html_file):
+    """Generate HTML report pages displaying the notebook statuses."""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    # Count statuses for summary
+    summary = {"SUCCESS": 0, "FAILURE": 0, "SKIPPED": 0}
+    for notebook in notebook_status:
+        summary[notebook["status"]] = summary.get(notebook["status"], 0) + 1
+
+    total = len(notebook_status)
+    success_count = summary["SUCCESS"] + summary["SKIPPED"]  # Include SKIPPED as success
+    success_percentage = (success_count / total) * 100 if total else 0
+    failure_percentage = (summary["FAILURE"] / total) * 100 if total else 0
 
-    with open(html_file, "w") as file:
-        file.write(html_content)
+    fields = {
+        "success": summary["SUCCESS"],
+        "failure": summary["FAILURE"],
+        "success_percentage": success_percentage,
+        "failure_percentage": failure_percentage,
+        "timestamp": timestamp,
+    }
+    return write_pages(html_file, HEAD, ROW, TAIL, rows(notebook_status), total, fields)
 
 def main():
-    notebook_status = parse_logs(LOG_FILE)
+    try:
+        notebook_status = read_store()
+    except sqlite3.Error as e:
+        print(f"Result store not readable: {e}")
+        notebook_status = []
+    if not notebook_status:
+        notebook_status = parse_logs(LOG_FILE)
     if not notebook_status:
         print("No notebook data found. Exiting.")
         return
-    generate_html(notebook_status, HTML_FILE)
-    print(f"HTML report generated: {HTML_FILE}")
+    pages = generate_html(notebook_status, HTML_FILE)
+    print(f"HTML report generated: {HTML_FILE} ({pages} page{'s' if pages > 1 else ''})")
 
 if __name__ == "__main__":
     main()
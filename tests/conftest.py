@@ -0,0 +1,4 @@
+import os, sys
+
+# the probes import e2e_helpers from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
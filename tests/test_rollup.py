@@ -0,0 +1,132 @@
+import random, sqlite3
+import pytest
+from e2e_helpers import rollup
+from e2e_helpers.rollup import QuantileSketch
+
+HOUR, DAY = 3600, 86400
+# 10:30 UTC, so the windows start inside an hourly and a daily bucket
+NOW = 1_792_000_000 // DAY * DAY + 10 * HOUR + 1800
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(rollup.SCHEMA)
+    yield conn
+    conn.close()
+
+
+def add(conn, ts, ok=True, duration=None, service="stac", target=None):
+    with conn:
+        rollup.update(conn, service, target, ok, duration, ts)
+
+
+def exact_quantile(values, q):
+    """The value at rank q * (n - 1) of the sorted values, as QuantileSketch.quantile ranks."""
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))]
+
+
+@pytest.mark.parametrize("q", [0.0, 0.5, 0.95, 0.99, 1.0])
+def test_sketch_quantile_within_relative_accuracy(q):
+    rng = random.Random(q)
+    values = [rng.lognormvariate(0, 2) for _ in range(5000)]
+    sketch = QuantileSketch()
+    for value in values:
+        sketch.add(value)
+    assert sketch.count == len(values)
+    assert sketch.quantile(q) == pytest.approx(exact_quantile(values, q), rel=0.01)
+
+
+def test_sketch_merge_equals_sketch_of_all_values():
+    a, b, both = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for i in range(1, 200):
+        (a if i % 3 else b).add(i / 10)
+        both.add(i / 10)
+    a.merge(b)
+    assert a.bins == both.bins
+
+
+def test_sketch_zero_and_negative_values_rank_lowest():
+    sketch = QuantileSketch()
+    for value in (0.0, -1.0, 5.0):
+        sketch.add(value)
+    assert sketch.quantile(0.0) == 0.0
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.quantile(1.0) == pytest.approx(5.0, rel=0.01)
+
+
+def test_sketch_json_round_trip_and_empty():
+    sketch = QuantileSketch()
+    assert sketch.quantile(0.5) is None
+    sketch.add(2.0, count=3)
+    restored = QuantileSketch.from_json(sketch.to_json())
+    assert restored.bins == sketch.bins
+    assert QuantileSketch.from_json(None).count == 0
+
+
+def test_update_fills_hourly_and_daily_buckets(conn):
+    add(conn, NOW, duration=1.0)
+    add(conn, NOW + 60, ok=False, duration=3.0)
+    rows = conn.execute("SELECT resolution, bucket, success, failure, duration_sum, duration_count FROM rollups "
+                        "ORDER BY resolution").fetchall()
+    assert rows == [("1d", NOW // DAY * DAY, 1, 1, 4.0, 2), ("1h", NOW // HOUR * HOUR, 1, 1, 4.0, 2)]
+
+
+def test_summary_24h_starts_at_the_hour_holding_now_minus_24h(conn):
+    start = (NOW - DAY) // HOUR * HOUR
+    add(conn, start - 1, ok=False)
+    add(conn, start)
+    # the nominal start, 30 minutes into the first bucket
+    add(conn, NOW - DAY)
+    summary = rollup.summary(conn, "stac", "24h", now=NOW)
+    assert summary["since"] == start
+    assert (summary["success"], summary["failure"], summary["availability"]) == (2, 0, 1.0)
+
+
+@pytest.mark.parametrize("window, days", [("7d", 7), ("30d", 30)])
+def test_summary_daily_windows_start_at_midnight_utc(conn, window, days):
+    start = (NOW - days * DAY) // DAY * DAY
+    add(conn, start - 1, ok=False)
+    add(conn, start, duration=2.0)
+    add(conn, NOW, ok=False, duration=4.0)
+    summary = rollup.summary(conn, "stac", window, now=NOW)
+    assert summary["since"] == start
+    # up to one day more than the nominal window
+    assert NOW - summary["since"] < (days + 1) * DAY
+    assert (summary["success"], summary["failure"], summary["availability"]) == (1, 1, 0.5)
+    assert summary["mean_duration"] == 3.0
+    assert summary["p95_duration"] == pytest.approx(2.0, rel=0.01)
+
+
+def test_summary_targets(conn):
+    add(conn, NOW, target="c1")
+    add(conn, NOW, ok=False, target="c2")
+    add(conn, NOW, ok=False)
+    assert rollup.summary(conn, "stac", now=NOW)["failure"] == 2
+    assert rollup.summary(conn, "stac", target="c1", now=NOW)["success"] == 1
+    assert rollup.summary(conn, "stac", target="", now=NOW)["failure"] == 1
+    assert rollup.summary(conn, "openeo", now=NOW)["availability"] is None
+
+
+def test_buckets_merge_targets_and_skip_empty_buckets(conn):
+    day = NOW // DAY * DAY
+    add(conn, day + HOUR, target="c1", duration=1.0)
+    add(conn, day + HOUR + 5, ok=False, target="c2")
+    add(conn, day + 3 * HOUR, target="c1")
+    result = rollup.buckets(conn, "stac", "1h", day, day + DAY)
+    assert [(bucket, s["success"], s["failure"]) for bucket, s in result] == [(day + HOUR, 1, 1), (day + 3 * HOUR, 1, 0)]
+    assert rollup.buckets(conn, "stac", "1h", day + 2 * HOUR, day + 3 * HOUR) == []
+
+
+def test_rebuild_matches_incremental_updates(conn):
+    conn.execute("CREATE TABLE results (id INTEGER PRIMARY KEY, service TEXT, target TEXT, status TEXT, "
+                 "duration REAL, ts REAL)")
+    rows = [("stac", "c1", "SUCCESS", 1.0, NOW), ("stac", None, "SKIPPED", None, NOW - DAY),
+            ("stac", "c1", "FAILURE", 2.0, NOW - 3 * HOUR)]
+    conn.executemany("INSERT INTO results (service, target, status, duration, ts) VALUES (?, ?, ?, ?, ?)", rows)
+    for service, target, status, duration, ts in rows:
+        add(conn, ts, status in ("SUCCESS", "SKIPPED"), duration, service, target)
+    before = conn.execute("SELECT * FROM rollups ORDER BY service, resolution, bucket, target").fetchall()
+    rollup.rebuild(conn)
+    assert conn.execute("SELECT * FROM rollups ORDER BY service, resolution, bucket, target").fetchall() == before
@@ -0,0 +1,127 @@
+import os, gzip, json
+from datetime import datetime
+import pytest
+from e2e_helpers import segments
+from e2e_helpers.segments import SegmentedLog, line_ts
+
+DAY = 86400
+
+
+@pytest.fixture
+def log(tmp_path):
+    return SegmentedLog(str(tmp_path / "logs" / "test_probe.log"), segment_days=1, retention_days=0)
+
+
+def line(ts, text="SUCCESS"):
+    return f"{datetime.fromtimestamp(ts):%Y-%m-%d %H:%M:%S} - {text}"
+
+
+# noon local time, so one day per segment never splits a test day
+START = line_ts("2026-03-02 12:00:00")
+
+
+def test_line_ts():
+    assert line_ts("2026-03-02 12:00 - SUCCESS") == line_ts("2026-03-02 12:00:00 - SUCCESS")
+    assert line_ts("Traceback (most recent call last):") is None
+
+
+def test_append_starts_a_new_segment_per_period_and_compresses_the_last(log):
+    for i in range(3):
+        log.append(line(START + i * DAY), START + i * DAY)
+    index = log.segments()
+    assert [s["closed"] for s in index] == [True, True, False]
+    assert all(s["file"].endswith(".gz") for s in index[:2])
+    with gzip.open(os.path.join(log.directory, index[0]["file"]), "rt") as f:
+        assert f.read() == line(START) + "\n"
+
+
+def test_read_time_window_opens_only_overlapping_segments(log, monkeypatch):
+    for i in range(4):
+        for j in range(3):
+            ts = START + i * DAY + j * 60
+            log.append(line(ts, f"{i}.{j}"), ts)
+    opened = []
+    real_open = log._open
+    monkeypatch.setattr(log, "_open", lambda segment: opened.append(segment["file"]) or real_open(segment))
+    lines = list(log.read(START + DAY + 60, START + 2 * DAY + 60))
+    assert [l.split(" - ")[1] for l in lines] == ["1.1", "1.2", "2.0", "2.1"]
+    assert len(opened) == 2
+
+
+def test_read_skips_to_the_indexed_offset(log, monkeypatch):
+    monkeypatch.setattr(segments, "INDEX_EVERY", 4)
+    for i in range(10):
+        log.append(line(START + i, str(i)), START + i)
+    offsets = log.segments()[0]["offsets"]
+    assert [ts for ts, _ in offsets] == [START, START + 4, START + 8]
+    assert [l.split(" - ")[1] for l in log.read(START + 5)] == ["5", "6", "7", "8", "9"]
+
+
+def test_lines_without_timestamp_stay_with_their_neighbours(log):
+    log.append(line(START, "FAILURE"), START)
+    log.append("Traceback (most recent call last):", START)
+    log.append(line(START + 60), START + 60)
+    assert list(log.read(START, START + 60))[1] == "Traceback (most recent call last):"
+
+
+def test_tail_across_segments(log):
+    for i in range(3):
+        for j in range(2):
+            log.append(line(START + i * DAY + j, f"{i}.{j}"), START + i * DAY + j)
+    assert [l.split(" - ")[1] for l in log.tail(3)] == ["1.1", "2.0", "2.1"]
+    assert log.tail(0) == []
+
+
+def test_read_new_continues_across_segments(log):
+    cursor = {}
+    log.append(line(START, "a"), START)
+    assert [l.split(" - ")[1] for l in log.read_new(cursor)] == ["a"]
+    assert cursor["reset"]
+    log.append(line(START + 1, "b"), START + 1)
+    log.append(line(START + DAY, "c"), START + DAY)
+    assert [l.split(" - ")[1] for l in log.read_new(cursor)] == ["b", "c"]
+    assert not cursor["reset"]
+    assert log.read_new(cursor) == []
+
+
+def test_retention_drops_old_closed_segments(tmp_path):
+    log = SegmentedLog(str(tmp_path / "test_probe.log"), segment_days=1, retention_days=2)
+    for i in range(5):
+        log.append(line(START + i * DAY), START + i * DAY)
+    index = log.segments()
+    assert [s["start"] for s in index] == [START + 2 * DAY, START + 3 * DAY, START + 4 * DAY]
+    assert sorted(os.listdir(log.directory)) == sorted([".lock", "index.json"] + [s["file"] for s in index])
+
+
+def test_legacy_log_is_read_in_place_and_migrated_on_append(log):
+    os.makedirs(os.path.dirname(log.legacy_path))
+    with open(log.legacy_path, "w") as f:
+        f.write(line(START, "old") + "\n" + line(START + DAY, "older") + "\n")
+    cursor = {}
+    assert [l.split(" - ")[1] for l in log.read_new(cursor)] == ["old", "older"]
+    assert [l.split(" - ")[1] for l in log.tail(1)] == ["older"]
+    # readers leave the file alone
+    assert not os.path.exists(log.directory)
+
+    log.append(line(START + 2 * DAY, "new"), START + 2 * DAY)
+    assert not os.path.exists(log.legacy_path)
+    assert [l.split(" - ")[1] for l in log.read()] == ["old", "older", "new"]
+    assert [s["closed"] for s in log.segments()] == [True, True, False]
+    # the legacy position is gone, reading starts over
+    assert [l.split(" - ")[1] for l in log.read_new(cursor)] == ["old", "older", "new"]
+    assert cursor["reset"]
+
+
+def test_readers_create_nothing(log):
+    assert log.segments() == [] and log.tail(5) == [] and list(log.read()) == [] and log.read_new({}) == []
+    assert not os.path.exists(os.path.dirname(log.legacy_path))
+
+
+def test_open_segment_compressed_after_the_index_was_read(log):
+    log.append(line(START), START)
+    stale = log.segments()
+    log.append(line(START + DAY), START + DAY)
+    with log._open(stale[0]) as f:
+        assert f.read().decode() == line(START) + "\n"
+    with open(log.index_path) as f:
+        assert json.load(f)["segments"][0]["closed"]
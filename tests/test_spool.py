@@ -0,0 +1,118 @@
+import pytest
+from opentelemetry.sdk.metrics.export import MetricExportResult
+from e2e_helpers import prom
+from e2e_helpers.spool import Spool, _HEADER
+
+
+@pytest.fixture
+def spool(tmp_path):
+    return Spool(str(tmp_path / "spool.bin"), max_bytes=64)
+
+
+def test_records_round_trip(spool):
+    spool.append(b"one")
+    spool.append(b"")
+    spool.append(b"three")
+    assert spool.read() == [b"one", b"", b"three"]
+
+
+def test_truncated_tail_record_is_ignored(spool):
+    spool.append(b"one")
+    with open(spool.path, "ab") as f:
+        f.write(_HEADER.pack(10) + b"short")
+    assert spool.read() == [b"one"]
+
+
+def test_cap_evicts_oldest_records(spool):
+    for i in range(8):
+        spool.append(bytes([i]) * 10)
+    records = spool.read()
+    assert sum(_HEADER.size + len(r) for r in records) <= spool.max_bytes
+    assert records == [bytes([i]) * 10 for i in range(8 - len(records), 8)]
+
+
+def test_record_larger_than_cap_is_dropped(spool):
+    spool.append(b"kept")
+    spool.append(b"x" * 64)
+    assert spool.read() == [b"kept"]
+
+
+def test_replace_and_clear(spool):
+    spool.append(b"one")
+    spool.replace([b"two", b"three"])
+    assert spool.read() == [b"two", b"three"]
+    spool.clear()
+    assert spool.read() == []
+
+
+class Request:
+    def __init__(self, body):
+        self.body = body
+
+    def SerializeToString(self):
+        return self.body
+
+
+@pytest.fixture
+def exporter(tmp_path, monkeypatch):
+    """Exporter whose requests are the bytes passed to export() and whose POSTs follow `outcomes`."""
+    monkeypatch.setattr(prom, "encode_metrics", Request)
+    exporter = prom.SpoolingMetricExporter("http://127.0.0.1:1/v1/metrics", {}, Spool(str(tmp_path / "spool.bin")))
+    exporter.posted, exporter.outcomes = [], {}
+
+    def post(body, timeout_millis):
+        exporter.posted.append(body)
+        return exporter.outcomes.get(body, "sent")
+
+    exporter._post = post
+    return exporter
+
+
+def test_replay_sends_spool_and_new_request_together(exporter):
+    exporter.spool.replace([b"a", b"b"])
+    assert exporter.export(b"c") == MetricExportResult.SUCCESS
+    assert exporter.posted == [b"abc"]
+    assert exporter.spool.read() == []
+
+
+def test_failed_export_is_spooled(exporter):
+    exporter.spool.replace([b"a"])
+    exporter.outcomes[b"ab"] = "keep"
+    assert exporter.export(b"b") == MetricExportResult.FAILURE
+    assert exporter.spool.read() == [b"a", b"b"]
+
+
+def test_rejected_request_without_spool_is_dropped(exporter):
+    exporter.outcomes[b"a"] = "drop"
+    assert exporter.export(b"a") == MetricExportResult.FAILURE
+    assert exporter.posted == [b"a"]
+    assert exporter.spool.read() == []
+
+
+def test_rejected_replay_drops_only_rejected_records(exporter):
+    exporter.spool.replace([b"a", b"b"])
+    exporter.outcomes.update({b"abc": "drop", b"a": "drop"})
+    assert exporter.export(b"c") == MetricExportResult.SUCCESS
+    assert exporter.posted == [b"abc", b"a", b"b", b"c"]
+    assert exporter.spool.read() == []
+
+
+def test_rejected_replay_keeps_records_from_first_retryable_failure(exporter):
+    exporter.spool.replace([b"a", b"b", b"c"])
+    exporter.outcomes.update({b"abcd": "drop", b"a": "drop", b"b": "keep"})
+    assert exporter.export(b"d") == MetricExportResult.FAILURE
+    assert exporter.posted == [b"abcd", b"a", b"b"]
+    assert exporter.spool.read() == [b"b", b"c", b"d"]
+
+
+@pytest.mark.parametrize("status, outcome", [
+    (200, "sent"), (400, "drop"), (413, "drop"), (401, "keep"), (403, "keep"), (408, "keep"), (429, "keep"),
+    (500, "keep"), (503, "keep"),
+])
+def test_post_outcome_by_status(tmp_path, monkeypatch, status, outcome):
+    class Response:
+        status_code = status
+
+    monkeypatch.setattr(prom.http_client, "post", lambda *args, **kwargs: Response())
+    exporter = prom.SpoolingMetricExporter("http://127.0.0.1:1/v1/metrics", {}, Spool(str(tmp_path / "spool.bin")))
+    assert exporter._post(b"a", 1000) == outcome
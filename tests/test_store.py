@@ -0,0 +1,77 @@
+import sqlite3
+import pytest
+from e2e_helpers import rollup, store
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "results.db")
+
+
+def test_record_and_read_back(db):
+    store.record("stac", "success", target="c1", message="ok", duration=1.5, extra={"n": 1}, ts=100, path=db)
+    store.record("stac", "FAILURE", target="c2", ts=200, path=db)
+    first, second = store.latest("stac", path=db)
+    assert (first.status, first.target, first.duration, first.extra, first.ok) == ("SUCCESS", "c1", 1.5, {"n": 1}, True)
+    assert (second.status, second.extra, second.ok) == ("FAILURE", None, False)
+    assert [r.target for r in store.latest("stac", 1, path=db)] == ["c2"]
+    assert [r.ts for r in store.latest("stac", target="c1", path=db)] == [100]
+
+
+def test_latest_per_target(db):
+    for ts, target, status in [(1, "b", "SUCCESS"), (2, "a", "FAILURE"), (3, "b", "FAILURE"), (4, None, "SUCCESS")]:
+        store.record("stac", status, target=target, ts=ts, path=db)
+    assert [(r.target, r.ts) for r in store.latest_per_target("stac", path=db)] == [("a", 2), ("b", 3)]
+
+
+def test_between_and_time_range(db):
+    for ts in (10, 20, 30):
+        store.record("openeo", "SUCCESS", ts=ts, path=db)
+    assert [r.ts for r in store.between("openeo", 10, 30, path=db)] == [10, 20]
+    assert store.time_range(path=db) == {"openeo": (10, 30)}
+
+
+def test_last_run_holds_only_the_newest_run(db, monkeypatch):
+    monkeypatch.setattr(store, "RUN_ID", "run1")
+    store.record("notebooks", "SUCCESS", target="a.ipynb", ts=1, path=db)
+    monkeypatch.setattr(store, "RUN_ID", "run2")
+    store.record("notebooks", "SKIPPED", target="a.ipynb", ts=2, path=db)
+    store.record("notebooks", "FAILURE", target="b.ipynb", ts=3, path=db)
+    assert [(r.target, r.status) for r in store.last_run("notebooks", path=db)] == [("a.ipynb", "SKIPPED"),
+                                                                                    ("b.ipynb", "FAILURE")]
+
+
+def test_record_updates_rollups(db):
+    store.record("stac", "SUCCESS", duration=1.0, ts=3600 * 5 + 10, path=db)
+    store.record("stac", "SKIPPED", ts=3600 * 5 + 20, path=db)
+    store.record("stac", "FAILURE", duration=3.0, ts=3600 * 5 + 30, path=db)
+    (bucket, hour), = store.buckets("stac", "1h", 0, 86400, path=db)
+    assert bucket == 3600 * 5
+    assert (hour["success"], hour["failure"], hour["mean_duration"]) == (2, 1, 2.0)
+
+
+def test_rollups_are_rebuilt_for_stores_without_them(db):
+    store.record("stac", "SUCCESS", duration=2.0, ts=7200, path=db)
+    with sqlite3.connect(db) as conn:
+        conn.execute("DELETE FROM rollups")
+    (bucket, day), = store.buckets("stac", "1d", 0, 86400, path=db)
+    assert (bucket, day["success"], day["mean_duration"]) == (0, 1, 2.0)
+
+
+def test_merge_adds_only_new_results(tmp_path, monkeypatch):
+    probe, shared = str(tmp_path / "probe.db"), str(tmp_path / "shared.db")
+    monkeypatch.setattr(store, "RUN_ID", "run1")
+    store.record("stac", "SUCCESS", target="c1", duration=1.0, ts=100, path=probe)
+    store.record("stac", "SUCCESS", target=None, duration=1.0, ts=100, path=probe)
+    store.record("openeo", "FAILURE", ts=50, path=shared)
+    assert store.merge(probe, path=shared) == 2
+    store.record("stac", "FAILURE", target="c1", duration=2.0, ts=200, path=probe)
+    assert store.merge(probe, path=shared) == 1
+    assert store.merge(probe, path=shared) == 0
+    assert [(r.ts, r.target, r.status) for r in store.latest("stac", path=shared)] == [
+        (100, "c1", "SUCCESS"), (100, None, "SUCCESS"), (200, "c1", "FAILURE")]
+    # the merged results are in the rollups of the shared store
+    (_, day), = store.buckets("stac", "1d", 0, 86400, path=shared)
+    assert (day["success"], day["failure"]) == (2, 1)
+    with sqlite3.connect(shared) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM rollups WHERE service = 'openeo'").fetchone()[0] == len(rollup.RESOLUTIONS)
@@ -0,0 +1,87 @@
+from e2e_helpers.zmeta import chunk_inventory, expected_chunk_keys, missing_chunks, time_variables
+
+URL = "https://example.org/cube"
+
+
+def zarray(shape, chunks, **extra):
+    return {"shape": shape, "chunks": chunks, "dtype": "<f4", "fill_value": "NaN", **extra}
+
+
+METADATA = {
+    ".zgroup": {"zarr_format": 2},
+    "red/.zarray": zarray([3, 25, 40], [1, 10, 20]),
+    "red/.zattrs": {"_ARRAY_DIMENSIONS": ["time", "y", "x"]},
+    "scl/.zarray": zarray([3, 20, 20], [2, 20, 20], dimension_separator="/"),
+    "scl/.zattrs": {"_ARRAY_DIMENSIONS": ["time", "y", "x"]},
+    "time/.zarray": zarray([3], [3]),
+    "time/.zattrs": {"_ARRAY_DIMENSIONS": ["time"]},
+    "x/.zarray": zarray([40], [40]),
+    "x/.zattrs": {"_ARRAY_DIMENSIONS": ["x"]},
+}
+
+
+class Response:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body
+
+    def raise_for_status(self):
+        assert self.status_code == 200
+
+    def json(self):
+        return self.body
+
+
+class Session:
+    """HEAD answers 200 for the chunk keys in `stored`, 404 for all others."""
+    def __init__(self, stored):
+        self.stored = set(stored)
+
+    def get(self, url, timeout=None):
+        assert url == f"{URL}/.zmetadata"
+        return Response(200, {"metadata": METADATA})
+
+    def head(self, url, timeout=None):
+        return Response(200 if url[len(URL) + 1:] in self.stored else 404)
+
+
+def all_keys(t):
+    return expected_chunk_keys(METADATA, "red", t) + expected_chunk_keys(METADATA, "scl", t)
+
+
+def test_time_variables_skip_coordinates():
+    assert time_variables(METADATA) == ["red", "scl"]
+
+
+def test_expected_chunk_keys_cover_partial_edge_chunks():
+    assert expected_chunk_keys(METADATA, "red", 1) == ["red/1.0.0", "red/1.0.1", "red/1.1.0", "red/1.1.1",
+                                                       "red/1.2.0", "red/1.2.1"]
+
+
+def test_expected_chunk_keys_negative_index_and_separator():
+    assert expected_chunk_keys(METADATA, "red", -1) == expected_chunk_keys(METADATA, "red", 2)
+    # timesteps 2 and 3 share the time chunk 1
+    assert expected_chunk_keys(METADATA, "scl", -1) == ["scl/1/0/0"]
+
+
+def test_inventory_of_complete_timestep():
+    inventory = chunk_inventory(URL, t=-1, session=Session(all_keys(1) + all_keys(2)))
+    assert inventory == {"red": {"absent": [], "missing": []}, "scl": {"absent": [], "missing": []}}
+
+
+def test_absent_chunk_is_missing_only_if_the_previous_timestep_had_it():
+    # red/2.2.1 is no-data at both timesteps, red/2.0.0 went missing
+    stored = set(all_keys(1) + all_keys(2)) - {"red/2.0.0", "red/2.2.1", "red/1.2.1"}
+    inventory = chunk_inventory(URL, t=2, session=Session(stored))
+    assert inventory["red"] == {"absent": ["red/2.0.0", "red/2.2.1"], "missing": ["red/2.0.0"]}
+    assert missing_chunks(URL, t=2, session=Session(stored)) == {"red": ["red/2.0.0"], "scl": []}
+
+
+def test_absent_chunk_shared_with_previous_timestep_is_never_missing():
+    stored = set(all_keys(1)) - {"scl/0/0/0"}
+    assert chunk_inventory(URL, t=1, session=Session(stored))["scl"] == {"absent": ["scl/0/0/0"], "missing": []}
+
+
+def test_absent_chunk_of_first_timestep_is_never_missing():
+    stored = set(all_keys(0)) - {"red/0.1.1"}
+    assert chunk_inventory(URL, t=0, session=Session(stored))["red"] == {"absent": ["red/0.1.1"], "missing": []}